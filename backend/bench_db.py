@@ -0,0 +1,95 @@
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# Write/read throughput of the transcript database under concurrent sessions, per storage profile.
+#   python bench_db.py --sessions 50 --turns 8 --profiles safe performance
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from database import Base, STORAGE_PROFILES, create_db_engine, create_async_db_engine
+from db_operations import AsyncDatabaseOperations, TurnWriter, WriteBehindTurnWriter
+from migrations import run_migrations
+from models import EvaluationResponse, InterviewerResponse
+
+
+def fake_question(i: int) -> InterviewerResponse:
+    return InterviewerResponse(question=f"Question {i}: how would you use INDEX/MATCH here?", difficulty="medium", finished=False)
+
+
+def fake_evaluation(i: int) -> EvaluationResponse:
+    return EvaluationResponse(score=i % 10, comments="Reasonable answer with room for detail. " * 4, detailed_report={"strengths": ["clear"]})
+
+
+async def run_session(writer: TurnWriter, session_id: str, turns: int):
+    await writer.start_session(session_id, fake_question(1))
+    for order in range(1, turns + 1):
+        await writer.save_turn(session_id, order, f"Answer {order} " * 20, fake_evaluation(order), fake_question(order + 1))
+    await writer.finish_session(session_id, average_score=6.5, overall_performance="Good")
+
+
+async def read_transcripts(session_factory, session_ids: list[str], rounds: int):
+    async def read(session_id):
+        async with session_factory() as db:
+            await AsyncDatabaseOperations(db).get_session_transcript(session_id)
+    for _ in range(rounds):
+        await asyncio.gather(*(read(session_id) for session_id in session_ids))
+
+
+async def bench_profile(name: str, sessions: int, turns: int, reads: int, write_behind: bool) -> dict:
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_db_"), "bench.db")
+    profile = STORAGE_PROFILES[name]
+    sync_engine = create_db_engine(f"sqlite:///{path}", profile)
+    Base.metadata.create_all(bind=sync_engine)
+    run_migrations(sync_engine)
+    sync_engine.dispose()
+
+    async_engine = create_async_db_engine(f"sqlite+aiosqlite:///{path}", profile)
+    session_factory = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    writer = WriteBehindTurnWriter(session_factory) if write_behind else TurnWriter(session_factory)
+    await writer.start()
+
+    session_ids = [f"bench-{i}" for i in range(sessions)]
+    start = time.perf_counter()
+    await asyncio.gather(*(run_session(writer, session_id, turns) for session_id in session_ids))
+    await writer.close()
+    write_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await read_transcripts(session_factory, session_ids, reads)
+    read_seconds = time.perf_counter() - start
+    await async_engine.dispose()
+
+    return {
+        "profile": name,
+        "turns_per_s": sessions * turns / write_seconds,
+        "transcripts_per_s": sessions * reads / read_seconds,
+        "write_s": write_seconds,
+        "read_s": read_seconds,
+    }
+
+
+async def main_async(args):
+    results = [
+        await bench_profile(name, args.sessions, args.turns, args.reads, args.write_behind)
+        for name in args.profiles
+    ]
+    print(f"{args.sessions} concurrent sessions x {args.turns} turns, {args.reads} transcript read rounds"
+          f"{' (write-behind)' if args.write_behind else ''}")
+    print(f"{'profile':<12} {'turns/s':>10} {'reads/s':>10} {'write s':>9} {'read s':>9}")
+    for r in results:
+        print(f"{r['profile']:<12} {r['turns_per_s']:>10.1f} {r['transcripts_per_s']:>10.1f} {r['write_s']:>9.2f} {r['read_s']:>9.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Transcript database throughput benchmark")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=8)
+    parser.add_argument("--reads", type=int, default=20)
+    parser.add_argument("--profiles", nargs="+", default=list(STORAGE_PROFILES), choices=list(STORAGE_PROFILES))
+    parser.add_argument("--write-behind", action="store_true")
+    asyncio.run(main_async(parser.parse_args()))
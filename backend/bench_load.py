@@ -0,0 +1,232 @@
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+
+# Drives N concurrent full interviews through the app in-process, with the three agents
+# replaced by deterministic fake models, to measure the server's own overhead.
+#   python bench_load.py --sessions 50 --turns 6 --llm-latency 0.05
+#   python bench_load.py --sessions 200 --json results.json
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+# Every session sends different answers anyway; keeping the cache off makes each turn cost
+# the same fake evaluator call.
+os.environ.setdefault("EVAL_CACHE_ENABLED", "false")
+INVOCATION_DIR = os.getcwd()
+os.chdir(tempfile.mkdtemp(prefix="bench_load_"))
+
+import asyncio
+import httpx
+from pydantic_ai.messages import ModelResponse, ToolCallPart, UserPromptPart
+from pydantic_ai.models.function import FunctionModel
+import main
+from interviewer import interviewer_agent
+from evaluator import evaluator_agent, final_report_agent
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def last_prompt(messages) -> str:
+    for message in reversed(messages):
+        for part in message.parts:
+            if isinstance(part, UserPromptPart) and isinstance(part.content, str):
+                return part.content
+    return ""
+
+
+def fake_interviewer(turns: int, latency: float) -> FunctionModel:
+    # Finishes once the context message reports `turns` answers, so every interview has the
+    # same length regardless of scheduling.
+    async def respond(messages, info):
+        await asyncio.sleep(latency)
+        match = re.search(r"Answers so far: (\d+)", last_prompt(messages))
+        answers = int(match.group(1)) if match else 0
+        output = {
+            "question": f"Question {answers + 1}: how would you use XLOOKUP with a fallback value?",
+            "difficulty": None if answers < 2 else "medium",
+            "finished": answers >= turns,
+        }
+        return ModelResponse(parts=[ToolCallPart(info.output_tools[0].name, output)])
+    return FunctionModel(respond)
+
+
+def fake_output(output: dict, latency: float) -> FunctionModel:
+    async def respond(messages, info):
+        await asyncio.sleep(latency)
+        return ModelResponse(parts=[ToolCallPart(info.output_tools[0].name, output)])
+    return FunctionModel(respond)
+
+
+FAKE_EVALUATION = {
+    "score": 7,
+    "comments": "Solid answer with a practical example.",
+    "detailed_report": {"strengths": ["Clear explanation"], "areas_for_improvement": ["Mention edge cases"]},
+}
+FAKE_REPORT = {
+    "session_id": "bench",
+    "total_questions": 0,
+    "average_score": 7.0,
+    "overall_performance": "Good",
+    "conversation_summary": "The candidate answered every question with practical examples.",
+    "detailed_analysis": {"interview_flow": "Smooth", "knowledge_depth": "Intermediate"},
+    "strengths": ["Lookups", "Pivot tables"],
+    "areas_for_improvement": ["Power Query"],
+    "recommendations": ["Practice dynamic arrays"],
+    "generated_at": "",
+}
+
+
+class LoopLagMonitor:
+    # Sleeps for a fixed interval and records how late it wakes up; a blocked event loop shows
+    # up directly as lag.
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.lags_ms: list[float] = []
+        self._task = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lags_ms.append(max(0.0, (time.perf_counter() - start - self.interval) * 1000))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+async def timed(timings: dict, endpoint: str, request):
+    start = time.perf_counter()
+    response = await request
+    timings.setdefault(endpoint, []).append((time.perf_counter() - start) * 1000)
+    return response
+
+
+async def run_interview(client: httpx.AsyncClient, index: int, turns: int, timings: dict, report_poll: float):
+    response = await timed(timings, "POST /interview/ start", client.post("/interview/", json={}))
+    response.raise_for_status()
+    data = response.json()
+    session_id = data["session_id"]
+
+    answer = 0
+    while not data["finished"]:
+        answer += 1
+        response = await timed(timings, "POST /interview/ answer", client.post("/interview/", json={
+            "session_id": session_id,
+            "user_input": f"Session {index} answer {answer}: I would combine XLOOKUP with IFERROR and a helper column.",
+        }))
+        response.raise_for_status()
+        data = response.json()
+        if answer > turns + 2:
+            raise RuntimeError(f"Interview {session_id} did not finish")
+
+    # httpx's ASGI transport waits for background tasks, so the final answer's latency also
+    # covers the report job; /report/ is then normally ready on the first poll.
+    while True:
+        response = await timed(timings, "GET /report/", client.get(f"/report/{session_id}"))
+        if response.status_code != 202:
+            break
+        await asyncio.sleep(report_poll)
+    response.raise_for_status()
+
+    response = await timed(timings, "GET /transcript/", client.get(f"/transcript/{session_id}"))
+    response.raise_for_status()
+
+
+async def run_load(args) -> dict:
+    timings: dict[str, list[float]] = {}
+    monitor = LoopLagMonitor()
+    semaphore = asyncio.Semaphore(args.concurrency or args.sessions)
+
+    async def one(index: int, client: httpx.AsyncClient):
+        async with semaphore:
+            await run_interview(client, index, args.turns, timings, args.report_poll)
+
+    async with main.lifespan(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            monitor.start()
+            start = time.perf_counter()
+            results = await asyncio.gather(*(one(i, client) for i in range(args.sessions)), return_exceptions=True)
+            elapsed = time.perf_counter() - start
+            await monitor.stop()
+
+    errors = [result for result in results if isinstance(result, Exception)]
+    requests = sum(len(values) for values in timings.values())
+    return {
+        "sessions": args.sessions,
+        "turns": args.turns,
+        "llm_latency": args.llm_latency,
+        "errors": len(errors),
+        "first_error": repr(errors[0]) if errors else None,
+        "elapsed_s": round(elapsed, 3),
+        "interviews_per_s": round((args.sessions - len(errors)) / elapsed, 2),
+        "requests_per_s": round(requests / elapsed, 2),
+        "endpoints": {
+            endpoint: {
+                "count": len(values),
+                "p50_ms": round(percentile(values, 50), 2),
+                "p95_ms": round(percentile(values, 95), 2),
+                "p99_ms": round(percentile(values, 99), 2),
+                "max_ms": round(max(values), 2),
+            }
+            for endpoint, values in timings.items()
+        },
+        "loop_lag": {
+            "p50_ms": round(percentile(monitor.lags_ms, 50), 2),
+            "p99_ms": round(percentile(monitor.lags_ms, 99), 2),
+            "max_ms": round(max(monitor.lags_ms, default=0.0), 2),
+        },
+    }
+
+
+def print_results(results: dict):
+    print(f"{results['sessions']} interviews x {results['turns']} answers, fake LLM latency {results['llm_latency']}s")
+    print(f"elapsed {results['elapsed_s']}s, {results['interviews_per_s']} interviews/s, {results['requests_per_s']} requests/s, {results['errors']} error(s)")
+    if results["first_error"]:
+        print(f"first error: {results['first_error']}")
+    print(f"{'endpoint':<26} {'count':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}  (ms)")
+    for endpoint, stats in results["endpoints"].items():
+        print(f"{endpoint:<26} {stats['count']:>6} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f} {stats['max_ms']:>9.2f}")
+    lag = results["loop_lag"]
+    print(f"{'event loop lag':<26} {'':>6} {lag['p50_ms']:>9.2f} {'':>9} {lag['p99_ms']:>9.2f} {lag['max_ms']:>9.2f}")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="In-process load test with deterministic fake models")
+    parser.add_argument("--sessions", type=int, default=20, help="number of full interviews")
+    parser.add_argument("--concurrency", type=int, default=0, help="interviews in flight at once (default: all)")
+    parser.add_argument("--turns", type=int, default=5, help="answers per interview before the interviewer finishes")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="artificial latency of every fake model call, seconds")
+    parser.add_argument("--report-poll", type=float, default=0.02, help="delay between /report/ polls while it is pending")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    with interviewer_agent.override(model=fake_interviewer(args.turns, args.llm_latency)), \
+         evaluator_agent.override(model=fake_output(FAKE_EVALUATION, args.llm_latency)), \
+         final_report_agent.override(model=fake_output(FAKE_REPORT, args.llm_latency)):
+        results = asyncio.run(run_load(args))
+
+    print_results(results)
+    if args.json:
+        with open(os.path.join(INVOCATION_DIR, args.json), "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main_cli()
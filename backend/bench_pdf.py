@@ -0,0 +1,151 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+# Measures generate_pdf_bytes and clean_text_for_pdf across report payloads of different
+# sizes. Results can be saved as a baseline and later runs compared against it.
+#   python bench_pdf.py --save-baseline pdf_baseline.json
+#   python bench_pdf.py --compare pdf_baseline.json --fail-over 20
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pdf_gen import generate_pdf_bytes, clean_text_for_pdf
+from models import FinalReport
+from report_model import build_report_model
+
+ANALYSIS_KEYS = [
+    "interview_flow", "performance_consistency", "knowledge_depth",
+    "practical_application", "communication_effectiveness", "role_relevance",
+]
+SENTENCE = "The candidate explained how to combine XLOOKUP with IFERROR to handle missing keys in a sales report. "
+EMOJI_SENTENCE = "Great work 🎉🚀 on pivot tables 📊✅ and charts 📈🎯, keep going 💯🔥 ⭐🏆 — naïve “quotes” included. "
+
+
+def make_report(sentences: int, items: int, text: str = SENTENCE) -> dict:
+    return {
+        "session_id": "bench-session",
+        "total_questions": 6,
+        "average_score": 7.25,
+        "overall_performance": "Good",
+        "conversation_summary": text * sentences,
+        "detailed_analysis": {key: text * sentences for key in ANALYSIS_KEYS},
+        "strengths": [f"Strength {i}: {text}" for i in range(items)],
+        "areas_for_improvement": [f"Area {i}: {text}" for i in range(items)],
+        "recommendations": [f"Recommendation {i}: {text}" for i in range(items)],
+        "generated_at": "2025-01-01T12:00:00",
+    }
+
+
+PAYLOADS = {
+    "small": make_report(sentences=1, items=2),
+    "typical": make_report(sentences=4, items=4),
+    "long_analysis": make_report(sentences=120, items=4),
+    "many_items": make_report(sentences=2, items=150),
+    "emoji_heavy": make_report(sentences=20, items=20, text=EMOJI_SENTENCE),
+}
+
+
+def report_strings(report: dict) -> list[str]:
+    strings = [report["conversation_summary"], report["overall_performance"]]
+    strings += list(report["detailed_analysis"].values())
+    for key in ("strengths", "areas_for_improvement", "recommendations"):
+        strings += report[key]
+    return strings
+
+
+def time_calls(fn, repeat: int) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def peak_memory_kib(fn) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def bench_payload(report: dict, repeat: int) -> dict:
+    strings = report_strings(report)
+    model = build_report_model("bench-session", FinalReport(**report))
+    render = lambda: generate_pdf_bytes(model)
+    clean = lambda: [clean_text_for_pdf(text) for text in strings]
+
+    render_ms = time_calls(render, repeat)
+    clean_ms = time_calls(clean, repeat)
+    return {
+        "input_chars": sum(len(text) for text in strings),
+        "pdf_bytes": len(render().getvalue()),
+        "render_median_ms": round(statistics.median(render_ms), 3),
+        "render_max_ms": round(max(render_ms), 3),
+        "render_peak_kib": round(peak_memory_kib(render), 1),
+        "clean_median_ms": round(statistics.median(clean_ms), 3),
+        "clean_peak_kib": round(peak_memory_kib(clean), 1),
+    }
+
+
+def compare(results: dict, baseline: dict, fail_over: float) -> bool:
+    # Only timings and sizes are compared; memory peaks are printed for information.
+    regressed = False
+    print(f"\n{'payload':<14} {'metric':<18} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, current in results.items():
+        previous = baseline.get("payloads", {}).get(name)
+        if not previous:
+            continue
+        for metric in ("render_median_ms", "clean_median_ms", "pdf_bytes", "render_peak_kib"):
+            before, after = previous.get(metric), current[metric]
+            if not before:
+                continue
+            change = (after - before) / before * 100
+            flag = ""
+            if metric != "render_peak_kib" and change > fail_over:
+                flag = "  REGRESSION"
+                regressed = True
+            print(f"{name:<14} {metric:<18} {before:>10} {after:>10} {change:>+7.1f}%{flag}")
+    return regressed
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="PDF generation benchmark")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--payloads", nargs="+", choices=sorted(PAYLOADS), default=list(PAYLOADS))
+    parser.add_argument("--save-baseline", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="compare against a baseline written by --save-baseline")
+    parser.add_argument("--fail-over", type=float, default=25.0, help="exit non-zero when a metric regresses by more than this percent")
+    args = parser.parse_args()
+
+    results = {name: bench_payload(PAYLOADS[name], args.repeat) for name in args.payloads}
+
+    print(f"{'payload':<14} {'chars':>8} {'pdf bytes':>10} {'render ms':>10} {'render max':>11} {'render KiB':>11} {'clean ms':>9} {'clean KiB':>10}")
+    for name, r in results.items():
+        print(
+            f"{name:<14} {r['input_chars']:>8} {r['pdf_bytes']:>10} {r['render_median_ms']:>10.3f} {r['render_max_ms']:>11.3f} "
+            f"{r['render_peak_kib']:>11.1f} {r['clean_median_ms']:>9.3f} {r['clean_peak_kib']:>10.1f}"
+        )
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({"python": platform.python_version(), "repeat": args.repeat, "payloads": results}, f, indent=2)
+        print(f"\nBaseline saved to {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.fail_over):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,70 @@
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Compares answer-turn latency of the serial and pipelined paths in POST /interview/
+# using fake models with fixed latency, so no OpenAI traffic is needed.
+#   python bench_turns.py --evaluator-latency 0.8 --interviewer-latency 1.5 --turns 5
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+# Both runs send the same answers, so the evaluation cache would hide the evaluator's latency.
+os.environ.setdefault("EVAL_CACHE_ENABLED", "false")
+os.chdir(tempfile.mkdtemp(prefix="bench_turns_"))
+
+import asyncio
+from fastapi.testclient import TestClient
+from pydantic_ai.messages import ModelResponse, ToolCallPart
+from pydantic_ai.models.function import FunctionModel
+import main
+from interviewer import interviewer_agent
+from evaluator import evaluator_agent
+
+
+def fake_model(output: dict, latency: float) -> FunctionModel:
+    async def respond(messages, info):
+        await asyncio.sleep(latency)
+        return ModelResponse(parts=[ToolCallPart(info.output_tools[0].name, output)])
+    return FunctionModel(respond)
+
+
+def run_interview(client: TestClient, turns: int, pipelined: bool) -> list[float]:
+    session_id = client.post("/interview/", json={}).json()["session_id"]
+    latencies = []
+    for i in range(turns):
+        start = time.perf_counter()
+        response = client.post("/interview/", json={
+            "session_id": session_id,
+            "user_input": f"Answer number {i + 1} about VLOOKUP and pivot tables.",
+            "pipelined": pipelined,
+        })
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Serial vs pipelined interview turn latency")
+    parser.add_argument("--evaluator-latency", type=float, default=0.8)
+    parser.add_argument("--interviewer-latency", type=float, default=1.5)
+    parser.add_argument("--turns", type=int, default=5)
+    args = parser.parse_args()
+
+    interviewer_model = fake_model({"question": "Next question?", "difficulty": "medium", "finished": False}, args.interviewer_latency)
+    evaluator_model = fake_model({"score": 7, "comments": "Solid answer.", "detailed_report": {}}, args.evaluator_latency)
+
+    with interviewer_agent.override(model=interviewer_model), evaluator_agent.override(model=evaluator_model), TestClient(main.app) as client:
+        results = {mode: run_interview(client, args.turns, mode == "pipelined") for mode in ("serial", "pipelined")}
+
+    print(f"{'mode':<10} {'mean':>8} {'p50':>8} {'max':>8}  (seconds per answered turn, {args.turns} turns)")
+    for mode, latencies in results.items():
+        print(f"{mode:<10} {statistics.mean(latencies):>8.3f} {statistics.median(latencies):>8.3f} {max(latencies):>8.3f}")
+    saved = statistics.mean(results["serial"]) - statistics.mean(results["pipelined"])
+    print(f"pipelined saves {saved:.3f}s per turn ({saved / statistics.mean(results['serial']):.0%})")
+
+
+if __name__ == "__main__":
+    main_cli()
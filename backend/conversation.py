@@ -0,0 +1,35 @@
+from typing import Optional
+
+# The conversation shown to clients is kept on the session as a list of entries, each stamped
+# with the session version it created. The version is the number of entries so far, so it only
+# ever grows and `since=<version>` is simply a slice.
+
+
+def append_entry(session: dict, entry_type: str, content: str) -> int:
+    conversation = session.setdefault("conversation", [])
+    version = len(conversation) + 1
+    conversation.append({"version": version, "type": entry_type, "content": content})
+    return version
+
+
+def session_version(session: dict) -> int:
+    return len(session.get("conversation", []))
+
+
+def entries_since(session: dict, since: Optional[int] = None) -> list[dict]:
+    conversation = session.get("conversation", [])
+    if not since or since < 0:
+        return list(conversation)
+    return conversation[since:]
+
+
+def rebuild_conversation(questions: list, answers: list) -> list[dict]:
+    # Sessions saved before the conversation was kept incrementally: interleave the asked
+    # questions with the answers once, on load.
+    session = {}
+    for i, question in enumerate(questions):
+        if question.question:
+            append_entry(session, "question", question.question)
+        if i < len(answers):
+            append_entry(session, "answer", answers[i].text)
+    return session.get("conversation", [])
@@ -1,12 +1,91 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Float, Boolean, ForeignKey
+from sqlalchemy import create_engine, event, Column, Integer, String, Text, DateTime, Float, Boolean, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.dialects.sqlite import JSON
+from dataclasses import dataclass, field
 from datetime import datetime
+import os
 
-DATABASE_URL = "sqlite:///./interview_transcripts.db"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+DATABASE_PATH = os.getenv("DATABASE_PATH", "./interview_transcripts.db")
+DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
+ASYNC_DATABASE_URL = f"sqlite+aiosqlite:///{DATABASE_PATH}"
+DB_PROFILE = os.getenv("DB_PROFILE", "performance")
+
+
+@dataclass
+class StorageProfile:
+    pragmas: dict[str, str] = field(default_factory=dict)
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30
+
+
+STORAGE_PROFILES = {
+    # SQLite's own defaults: rollback journal and a full fsync on every commit.
+    "safe": StorageProfile(),
+    # WAL lets readers run while a turn is being written, and synchronous=NORMAL only
+    # fsyncs at checkpoints, which is still crash-safe in WAL mode.
+    "performance": StorageProfile(
+        pragmas={
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": "5000",
+            "cache_size": "-32000",
+            "mmap_size": "268435456",
+            "temp_store": "MEMORY",
+        },
+        pool_size=10,
+        max_overflow=20,
+    ),
+}
+
+
+def get_storage_profile(name: str = DB_PROFILE) -> StorageProfile:
+    if name not in STORAGE_PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE: {name}")
+    return STORAGE_PROFILES[name]
+
+
+def apply_pragmas(profile: StorageProfile):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in profile.pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+    return on_connect
+
+
+def create_db_engine(url: str = DATABASE_URL, profile: StorageProfile = None):
+    profile = profile or get_storage_profile()
+    db_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        pool_size=profile.pool_size,
+        max_overflow=profile.max_overflow,
+        pool_timeout=profile.pool_timeout,
+    )
+    event.listen(db_engine, "connect", apply_pragmas(profile))
+    return db_engine
+
+
+def create_async_db_engine(url: str = ASYNC_DATABASE_URL, profile: StorageProfile = None):
+    profile = profile or get_storage_profile()
+    db_engine = create_async_engine(
+        url,
+        pool_size=profile.pool_size,
+        max_overflow=profile.max_overflow,
+        pool_timeout=profile.pool_timeout,
+    )
+    event.listen(db_engine.sync_engine, "connect", apply_pragmas(profile))
+    return db_engine
+
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+async_engine = create_async_db_engine()
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
 class InterviewSession(Base):
@@ -19,13 +98,23 @@ class InterviewSession(Base):
     total_questions = Column(Integer, default=0)
     average_score = Column(Float, nullable=True)
     overall_performance = Column(String, nullable=True)
+    transcript_json = Column(JSON, nullable=True)
+    final_report_json = Column(JSON, nullable=True)
+    # Running totals over every LLM call made for the session (see LlmUsage).
+    input_tokens = Column(Integer, default=0)
+    cache_read_tokens = Column(Integer, default=0)
+    output_tokens = Column(Integer, default=0)
+    cost_usd = Column(Float, default=0.0)
     
-    questions = relationship("Question", back_populates="session")
+    questions = relationship("Question", back_populates="session", order_by="Question.question_order")
     answers = relationship("Answer", back_populates="session")
     evaluations = relationship("Evaluation", back_populates="session")
 
 class Question(Base):
     __tablename__ = "questions"
+    __table_args__ = (
+        Index("ix_questions_session_id_question_order", "session_id", "question_order"),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     session_id = Column(String, ForeignKey("interview_sessions.id"))
@@ -35,11 +124,15 @@ class Question(Base):
     created_at = Column(DateTime, default=datetime.now())
     
     session = relationship("InterviewSession", back_populates="questions")
-    answers = relationship("Answer", back_populates="question")
+    answers = relationship("Answer", back_populates="question", order_by="Answer.id")
     evaluations = relationship("Evaluation", back_populates="question")
 
 class Answer(Base):
     __tablename__ = "answers"
+    __table_args__ = (
+        Index("ix_answers_session_id_question_id", "session_id", "question_id"),
+        Index("ix_answers_question_id", "question_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     session_id = Column(String, ForeignKey("interview_sessions.id"))
@@ -49,10 +142,14 @@ class Answer(Base):
     
     session = relationship("InterviewSession", back_populates="answers")
     question = relationship("Question", back_populates="answers")
-    evaluations = relationship("Evaluation", back_populates="answer")
+    evaluations = relationship("Evaluation", back_populates="answer", order_by="Evaluation.id")
 
 class Evaluation(Base):
     __tablename__ = "evaluations"
+    __table_args__ = (
+        Index("ix_evaluations_session_id_question_id", "session_id", "question_id"),
+        Index("ix_evaluations_answer_id", "answer_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     session_id = Column(String, ForeignKey("interview_sessions.id"))
@@ -67,16 +164,53 @@ class Evaluation(Base):
     question = relationship("Question", back_populates="evaluations")
     answer = relationship("Answer", back_populates="evaluations")
 
+class BankQuestion(Base):
+    __tablename__ = "question_bank"
+    __table_args__ = (
+        Index("ix_question_bank_difficulty_topic", "difficulty", "topic"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    topic = Column(String, nullable=False)
+    difficulty = Column(String, nullable=False)
+    question_text = Column(Text, nullable=False)
+    text_hash = Column(String, nullable=False, unique=True)
+    prompt_version = Column(String, nullable=False)
+    is_active = Column(Boolean, default=True)
+    created_at = Column(DateTime, default=datetime.now)
+
+class LlmUsage(Base):
+    # One row per agent call, linked to the question the interviewer generated or the
+    # evaluation the evaluator produced; final report calls only link to the session.
+    __tablename__ = "llm_usage"
+    __table_args__ = (
+        Index("ix_llm_usage_created_at_agent", "created_at", "agent"),
+        Index("ix_llm_usage_session_id", "session_id"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    session_id = Column(String, ForeignKey("interview_sessions.id"))
+    question_id = Column(Integer, ForeignKey("questions.id"), nullable=True)
+    evaluation_id = Column(Integer, ForeignKey("evaluations.id"), nullable=True)
+    agent = Column(String, nullable=False)
+    model = Column(String, nullable=True)
+    input_tokens = Column(Integer, default=0)
+    cache_read_tokens = Column(Integer, default=0)
+    output_tokens = Column(Integer, default=0)
+    cost_usd = Column(Float, default=0.0)
+    created_at = Column(DateTime, default=datetime.now)
+
 def create_tables():
     Base.metadata.create_all(bind=engine)
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 def init_database():
+    from migrations import run_migrations
     create_tables()
-    print("✅ Database initialized successfully")
+    run_migrations(engine)
+
+async def close_database():
+    await async_engine.dispose()
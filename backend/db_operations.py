@@ -1,29 +1,107 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update, func
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, replace
 from datetime import datetime
-from typing import Optional
-from database import InterviewSession, Question, Answer, Evaluation
-from models import EvaluationResponse
+from typing import Awaitable, Callable, Optional, Sequence
+from database import InterviewSession, Question, Answer, Evaluation, LlmUsage, AsyncSessionLocal
+from models import EvaluationResponse, InterviewerResponse, FinalReport
+from metrics import DB_OPERATION_SECONDS, timed_db
+from tracing import span, traced
+from usage_stats import UsageRecord
 
-class DatabaseOperations:
-    def __init__(self, db: Session):
+DB_WRITE_BEHIND = os.getenv("DB_WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+DB_FLUSH_INTERVAL_MS = int(os.getenv("DB_FLUSH_INTERVAL_MS", "50"))
+DB_FLUSH_MAX_RETRIES = int(os.getenv("DB_FLUSH_MAX_RETRIES", "5"))
+DB_FLUSH_RETRY_BACKOFF_MS = int(os.getenv("DB_FLUSH_RETRY_BACKOFF_MS", "200"))
+
+logger = logging.getLogger(__name__)
+
+# Loads questions -> answers -> evaluations in one SELECT per level instead of one per row.
+TRANSCRIPT_LOAD_OPTIONS = (
+    selectinload(InterviewSession.questions)
+    .selectinload(Question.answers)
+    .selectinload(Answer.evaluations),
+)
+
+
+def serialize_transcript(session: InterviewSession) -> dict:
+    questions_data = []
+    for question in session.questions:
+        question_data = {
+            "question_id": question.id,
+            "question_text": question.question_text,
+            "difficulty": question.difficulty,
+            "question_order": question.question_order,
+            "created_at": question.created_at.isoformat(),
+            "answers": []
+        }
+        
+        for answer in question.answers:
+            answer_data = {
+                "answer_id": answer.id,
+                "answer_text": answer.answer_text,
+                "created_at": answer.created_at.isoformat(),
+                "evaluations": []
+            }
+            
+            for evaluation in answer.evaluations:
+                evaluation_data = {
+                    "evaluation_id": evaluation.id,
+                    "score": evaluation.score,
+                    "comments": evaluation.comments,
+                    "detailed_report": evaluation.detailed_report,
+                    "created_at": evaluation.created_at.isoformat()
+                }
+                answer_data["evaluations"].append(evaluation_data)
+            
+            question_data["answers"].append(answer_data)
+        
+        questions_data.append(question_data)
+    
+    return {
+        "session_id": session.id,
+        "created_at": session.created_at.isoformat(),
+        "finished_at": session.finished_at.isoformat() if session.finished_at else None,
+        "is_finished": session.is_finished,
+        "total_questions": session.total_questions,
+        "average_score": session.average_score,
+        "overall_performance": session.overall_performance,
+        "usage": {
+            "input_tokens": session.input_tokens or 0,
+            "cache_read_tokens": session.cache_read_tokens or 0,
+            "output_tokens": session.output_tokens or 0,
+            "cost_usd": round(session.cost_usd or 0.0, 6)
+        },
+        "questions": questions_data
+    }
+
+
+class AsyncDatabaseOperations:
+    def __init__(self, db: AsyncSession):
         self.db = db
     
-    def create_session(self, session_id: str) -> InterviewSession:
+    async def create_session(self, session_id: str) -> InterviewSession:
         session = InterviewSession(
             id=session_id,
             created_at=datetime.now(),
             is_finished=False
         )
         self.db.add(session)
-        self.db.commit()
-        self.db.refresh(session)
-        print(f"Created new session in database: {session_id}")
+        await self.db.commit()
+        await self.db.refresh(session)
+        logger.debug("created session", extra={"session_id": session_id})
         return session
     
-    def get_session(self, session_id: str) -> Optional[InterviewSession]:
-        return self.db.query(InterviewSession).filter(InterviewSession.id == session_id).first()
+    async def get_session(self, session_id: str) -> Optional[InterviewSession]:
+        result = await self.db.execute(select(InterviewSession).where(InterviewSession.id == session_id))
+        return result.scalars().first()
     
-    def save_question(self, session_id: str, question_text: str, difficulty: str = None, question_order: int = 1) -> Question:
+    async def save_question(self, session_id: str, question_text: str, difficulty: str = None, question_order: int = 1) -> Question:
         question = Question(
             session_id=session_id,
             question_text=question_text,
@@ -32,12 +110,12 @@ class DatabaseOperations:
             created_at=datetime.now()
         )
         self.db.add(question)
-        self.db.commit()
-        self.db.refresh(question)
-        print(f" Saved question to database: {question_text[:50]}...")
+        await self.db.commit()
+        await self.db.refresh(question)
+        logger.debug("saved question", extra={"session_id": session_id, "question_order": question_order})
         return question
     
-    def save_answer(self, session_id: str, question_id: int, answer_text: str) -> Answer:
+    async def save_answer(self, session_id: str, question_id: int, answer_text: str) -> Answer:
         answer = Answer(
             session_id=session_id,
             question_id=question_id,
@@ -45,12 +123,12 @@ class DatabaseOperations:
             created_at=datetime.now()
         )
         self.db.add(answer)
-        self.db.commit()
-        self.db.refresh(answer)
-        print(f"Saved answer to database: {answer_text[:50]}...")
+        await self.db.commit()
+        await self.db.refresh(answer)
+        logger.debug("saved answer", extra={"session_id": session_id, "question_id": question_id})
         return answer
     
-    def save_evaluation(self, session_id: str, question_id: int, answer_id: int, evaluation: EvaluationResponse) -> Evaluation:
+    async def save_evaluation(self, session_id: str, question_id: int, answer_id: int, evaluation: EvaluationResponse) -> Evaluation:
         evaluation_record = Evaluation(
             session_id=session_id,
             question_id=question_id,
@@ -61,13 +139,14 @@ class DatabaseOperations:
             created_at=datetime.now()
         )
         self.db.add(evaluation_record)
-        self.db.commit()
-        self.db.refresh(evaluation_record)
-        print(f"saved evaluation to database: Score {evaluation.score}")
+        await self.db.commit()
+        await self.db.refresh(evaluation_record)
+        logger.debug("saved evaluation", extra={"session_id": session_id, "score": evaluation.score})
         return evaluation_record
     
-    def finish_session(self, session_id: str, average_score: float = None, overall_performance: str = None):
-        session = self.get_session(session_id)
+    async def finish_session(self, session_id: str, average_score: float = None, overall_performance: str = None,
+                             final_report: FinalReport = None, commit: bool = True):
+        session = await self.get_transcript_session(session_id)
         if session:
             session.is_finished = True
             session.finished_at = datetime.now()
@@ -76,55 +155,305 @@ class DatabaseOperations:
                 session.average_score = average_score
             if overall_performance is not None:
                 session.overall_performance = overall_performance
-            self.db.commit()
-            print(f" Marked session as finished: {session_id}")
+            if final_report is not None:
+                session.final_report_json = final_report.model_dump(mode="json")
+            # A finished transcript never changes, so it is serialized once here and later
+            # served as a single-row read.
+            session.transcript_json = serialize_transcript(session)
+            if commit:
+                await self.db.commit()
+            else:
+                await self.db.flush()
+            logger.debug("marked session finished", extra={"session_id": session_id})
+    
+    async def get_transcript_session(self, session_id: str) -> Optional[InterviewSession]:
+        result = await self.db.execute(
+            select(InterviewSession).where(InterviewSession.id == session_id).options(*TRANSCRIPT_LOAD_OPTIONS)
+        )
+        return result.scalars().first()
     
-    def get_session_transcript(self, session_id: str) -> dict:
-        session = self.get_session(session_id)
+    @traced("db get_session_transcript")
+    @timed_db("get_session_transcript")
+    async def get_session_transcript(self, session_id: str) -> dict:
+        session = await self.get_session(session_id)
         if not session:
             return None
-        
-        questions_data = []
-        for question in session.questions:
-            question_data = {
-                "question_id": question.id,
-                "question_text": question.question_text,
-                "difficulty": question.difficulty,
-                "question_order": question.question_order,
-                "created_at": question.created_at.isoformat(),
-                "answers": []
-            }
-            
-            for answer in question.answers:
-                answer_data = {
-                    "answer_id": answer.id,
-                    "answer_text": answer.answer_text,
-                    "created_at": answer.created_at.isoformat(),
-                    "evaluations": []
-                }
-                
-                for evaluation in answer.evaluations:
-                    evaluation_data = {
-                        "evaluation_id": evaluation.id,
-                        "score": evaluation.score,
-                        "comments": evaluation.comments,
-                        "detailed_report": evaluation.detailed_report,
-                        "created_at": evaluation.created_at.isoformat()
-                    }
-                    answer_data["evaluations"].append(evaluation_data)
-                
-                question_data["answers"].append(answer_data)
-            
-            questions_data.append(question_data)
-        
-        return {
-            "session_id": session.id,
-            "created_at": session.created_at.isoformat(),
-            "finished_at": session.finished_at.isoformat() if session.finished_at else None,
-            "is_finished": session.is_finished,
-            "total_questions": session.total_questions,
-            "average_score": session.average_score,
-            "overall_performance": session.overall_performance,
-            "questions": questions_data
-        }
+        if session.is_finished and session.transcript_json:
+            return session.transcript_json
+        return serialize_transcript(await self.get_transcript_session(session_id))
     
+    @traced("db get_final_report")
+    @timed_db("get_final_report")
+    async def get_final_report(self, session_id: str) -> Optional[FinalReport]:
+        final_report_json = await self.db.scalar(
+            select(InterviewSession.final_report_json).where(InterviewSession.id == session_id)
+        )
+        return FinalReport.model_validate(final_report_json) if final_report_json else None
+    
+    async def save_final_report(self, session_id: str, final_report: FinalReport):
+        session = await self.get_session(session_id)
+        if session:
+            session.final_report_json = final_report.model_dump(mode="json")
+            await self.db.commit()
+    
+    async def list_sessions_missing_report(self) -> list[tuple[str, bool]]:
+        # Unfinished rows are included: a session whose report job never completed is still
+        # is_finished=False here, and only the session store knows the interview ended.
+        query = select(InterviewSession.id, InterviewSession.is_finished).where(
+            InterviewSession.final_report_json.is_(None)
+        ).order_by(InterviewSession.is_finished.desc(), InterviewSession.finished_at, InterviewSession.created_at)
+        result = await self.db.execute(query)
+        return [(row.id, bool(row.is_finished)) for row in result]
+    
+    @traced("db usage_by_day")
+    @timed_db("usage_by_day")
+    async def usage_by_day(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> list[dict]:
+        day = func.date(LlmUsage.created_at)
+        query = select(
+            day.label("day"),
+            LlmUsage.agent,
+            func.count(LlmUsage.id).label("calls"),
+            func.sum(LlmUsage.input_tokens).label("input_tokens"),
+            func.sum(LlmUsage.cache_read_tokens).label("cache_read_tokens"),
+            func.sum(LlmUsage.output_tokens).label("output_tokens"),
+            func.sum(LlmUsage.cost_usd).label("cost_usd"),
+        ).group_by(day, LlmUsage.agent).order_by(day, LlmUsage.agent)
+        if start is not None:
+            query = query.where(LlmUsage.created_at >= start)
+        if end is not None:
+            query = query.where(LlmUsage.created_at < end)
+        result = await self.db.execute(query)
+        return [
+            {**row._asdict(), "cost_usd": round(row.cost_usd or 0.0, 6)}
+            for row in result
+        ]
+    
+    @traced("db list_finished_session_ids")
+    @timed_db("list_finished_session_ids")
+    async def list_finished_session_ids(self, start: Optional[datetime] = None, end: Optional[datetime] = None, limit: Optional[int] = None) -> list[str]:
+        query = select(InterviewSession.id).where(InterviewSession.is_finished == True)
+        if start is not None:
+            query = query.where(InterviewSession.finished_at >= start)
+        if end is not None:
+            query = query.where(InterviewSession.finished_at < end)
+        query = query.order_by(InterviewSession.finished_at)
+        if limit is not None:
+            query = query.limit(limit)
+        result = await self.db.execute(query)
+        return list(result.scalars().all())
+
+
+# Write operations used by the turn writers. They only add/flush; the caller owns the transaction.
+WriteOp = Callable[[AsyncSession], Awaitable[None]]
+
+async def question_id_for_order(db: AsyncSession, session_id: str, question_order: int) -> Optional[int]:
+    return await db.scalar(
+        select(Question.id).where(Question.session_id == session_id, Question.question_order == question_order)
+    )
+
+async def add_session(db: AsyncSession, session_id: str):
+    db.add(InterviewSession(id=session_id, created_at=datetime.now(), is_finished=False))
+    await db.flush()
+
+async def add_usage(db: AsyncSession, session_id: str, usage: Sequence[UsageRecord], question_id: int = None, evaluation_id: int = None):
+    if not usage:
+        return
+    now = datetime.now()
+    db.add_all([
+        LlmUsage(
+            session_id=session_id,
+            question_id=question_id,
+            evaluation_id=evaluation_id,
+            agent=record.agent,
+            model=record.model,
+            input_tokens=record.input_tokens,
+            cache_read_tokens=record.cache_read_tokens,
+            output_tokens=record.output_tokens,
+            cost_usd=record.cost_usd,
+            created_at=now
+        )
+        for record in usage
+    ])
+    await db.execute(
+        update(InterviewSession).where(InterviewSession.id == session_id).values(
+            input_tokens=func.coalesce(InterviewSession.input_tokens, 0) + sum(r.input_tokens for r in usage),
+            cache_read_tokens=func.coalesce(InterviewSession.cache_read_tokens, 0) + sum(r.cache_read_tokens for r in usage),
+            output_tokens=func.coalesce(InterviewSession.output_tokens, 0) + sum(r.output_tokens for r in usage),
+            cost_usd=func.coalesce(InterviewSession.cost_usd, 0) + sum(r.cost_usd for r in usage),
+        )
+    )
+    await db.flush()
+
+async def add_question(db: AsyncSession, session_id: str, output: InterviewerResponse, question_order: int, default_text: str = None,
+                       usage: Sequence[UsageRecord] = ()):
+    question_text = output.question or default_text
+    if not question_text:
+        await add_usage(db, session_id, usage)
+        return
+    question = Question(
+        session_id=session_id,
+        question_text=question_text,
+        difficulty=output.difficulty,
+        question_order=question_order,
+        created_at=datetime.now()
+    )
+    db.add(question)
+    await db.flush()
+    await add_usage(db, session_id, usage, question_id=question.id)
+
+async def add_answer(db: AsyncSession, session_id: str, question_order: int, answer_text: str, evaluation: EvaluationResponse,
+                     usage: Sequence[UsageRecord] = ()):
+    question_id = await question_id_for_order(db, session_id, question_order)
+    if question_id is None:
+        logger.warning("no question for answer, skipping", extra={"session_id": session_id, "question_order": question_order})
+        await add_usage(db, session_id, usage)
+        return
+    answer = Answer(session_id=session_id, question_id=question_id, answer_text=answer_text, created_at=datetime.now())
+    db.add(answer)
+    await db.flush()
+    evaluation_record = Evaluation(
+        session_id=session_id,
+        question_id=question_id,
+        answer_id=answer.id,
+        score=evaluation.score,
+        comments=evaluation.comments,
+        detailed_report=evaluation.detailed_report,
+        created_at=datetime.now()
+    )
+    db.add(evaluation_record)
+    await db.flush()
+    await add_usage(db, session_id, usage, question_id=question_id, evaluation_id=evaluation_record.id)
+
+async def mark_finished(db: AsyncSession, session_id: str, average_score: float = None, overall_performance: str = None,
+                        final_report: FinalReport = None, usage: Sequence[UsageRecord] = ()):
+    await add_usage(db, session_id, usage)
+    await AsyncDatabaseOperations(db).finish_session(session_id, average_score, overall_performance, final_report, commit=False)
+
+
+class TurnWriter:
+    # Unit of work for interview turns: every call writes all of its rows in a single
+    # transaction on a session the writer opens itself, so nothing depends on a
+    # request-scoped Session.
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self.session_factory = session_factory
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def flush(self):
+        pass
+
+    async def submit(self, ops: list[WriteOp], operation: str = "write", session_id: Optional[str] = None):
+        with span(f"db {operation}", ops=len(ops)), DB_OPERATION_SECONDS.labels(operation).time():
+            async with self.session_factory() as db:
+                async with db.begin():
+                    for op in ops:
+                        await op(db)
+
+    async def start_session(self, session_id: str, first_question: InterviewerResponse, usage: Sequence[UsageRecord] = ()):
+        await self.submit([
+            lambda db: add_session(db, session_id),
+            lambda db: add_question(db, session_id, first_question, 1, default_text="Introduction", usage=usage),
+        ], "start_session", session_id)
+
+    async def save_turn(self, session_id: str, question_order: int, answer_text: str, evaluation: EvaluationResponse, next_question: InterviewerResponse,
+                        evaluation_usage: Sequence[UsageRecord] = (), question_usage: Sequence[UsageRecord] = ()):
+        await self.submit([
+            lambda db: add_answer(db, session_id, question_order, answer_text, evaluation, evaluation_usage),
+            lambda db: add_question(db, session_id, next_question, question_order + 1, usage=question_usage),
+        ], "save_turn", session_id)
+
+    async def finish_session(self, session_id: str, average_score: float = None, overall_performance: str = None,
+                             final_report: FinalReport = None, usage: Sequence[UsageRecord] = ()):
+        await self.submit([lambda db: mark_finished(db, session_id, average_score, overall_performance, final_report, usage)], "finish_session", session_id)
+
+
+@dataclass
+class QueuedWrite:
+    session_id: Optional[str]
+    ops: list[WriteOp]
+    attempts: int = 0
+    retry_at: float = 0.0
+
+
+class WriteBehindTurnWriter(TurnWriter):
+    # Queues turn writes and commits everything queued across sessions in one transaction
+    # every flush interval. Operations keep their submission order, so a session's answer
+    # always lands after the question it refers to.
+    def __init__(self, session_factory=AsyncSessionLocal, flush_interval_ms: int = DB_FLUSH_INTERVAL_MS):
+        super().__init__(session_factory)
+        self.flush_interval = flush_interval_ms / 1000
+        self._pending: list[QueuedWrite] = []
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("write-behind flush failed")
+
+    async def submit(self, ops: list[WriteOp], operation: str = "write", session_id: Optional[str] = None):
+        self._pending.append(QueuedWrite(session_id, ops))
+
+    async def flush(self, force: bool = False):
+        async with self._flush_lock:
+            now = time.monotonic()
+            # A session waiting to retry holds back its later writes too, so they stay in order.
+            waiting = set() if force else {write.session_id for write in self._pending if write.retry_at > now}
+            ready = [write for write in self._pending if write.session_id not in waiting]
+            if not ready:
+                return
+            self._pending = [write for write in self._pending if write.session_id in waiting]
+            try:
+                await TurnWriter.submit(self, [op for write in ready for op in write.ops], "write_behind_flush")
+                return
+            except Exception as e:
+                logger.warning("write-behind batch failed, committing per session", extra={"writes": len(ready), "error": str(e)})
+
+            # The failed batch was rolled back as a whole; one session's bad write must not
+            # cost the others their turns.
+            by_session: dict[Optional[str], list[QueuedWrite]] = {}
+            for write in ready:
+                by_session.setdefault(write.session_id, []).append(write)
+            retries: list[QueuedWrite] = []
+            for session_id, writes in by_session.items():
+                try:
+                    await TurnWriter.submit(self, [op for write in writes for op in write.ops], "write_behind_session")
+                except Exception as e:
+                    attempts = max(write.attempts for write in writes) + 1
+                    if attempts >= DB_FLUSH_MAX_RETRIES:
+                        logger.error("dropping write-behind writes", extra={"session_id": session_id, "writes": len(writes), "error": str(e)})
+                        continue
+                    retry_at = time.monotonic() + DB_FLUSH_RETRY_BACKOFF_MS / 1000 * 2 ** (attempts - 1)
+                    logger.warning("write-behind writes requeued", extra={"session_id": session_id, "attempt": attempts, "error": str(e)})
+                    retries += [replace(write, attempts=attempts, retry_at=retry_at) for write in writes]
+            # Ahead of anything the same sessions submitted while this flush ran.
+            self._pending = retries + self._pending
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Retries are not waited out on shutdown; every queued write gets its remaining attempts now.
+        while self._pending:
+            await self.flush(force=True)
+
+
+def create_turn_writer() -> TurnWriter:
+    if DB_WRITE_BEHIND:
+        return WriteBehindTurnWriter(flush_interval_ms=DB_FLUSH_INTERVAL_MS)
+    return TurnWriter()
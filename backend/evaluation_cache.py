@@ -0,0 +1,176 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Optional
+import aiosqlite
+from evaluator import evaluate_answer
+from tracing import span
+from models import EvaluationResponse
+from prompt import evaluator_prompt, prompt_version
+
+EVAL_CACHE_ENABLED = os.getenv("EVAL_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+EVAL_CACHE_DB_PATH = os.getenv("EVAL_CACHE_DB_PATH", "./evaluation_cache.db")
+EVAL_CACHE_TTL_SECONDS = int(os.getenv("EVAL_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+EVAL_CACHE_MEMORY_SIZE = int(os.getenv("EVAL_CACHE_MEMORY_SIZE", "1024"))
+EVAL_CACHE_MAX_ROWS = int(os.getenv("EVAL_CACHE_MAX_ROWS", "100000"))
+
+logger = logging.getLogger(__name__)
+
+
+# Bumped whenever normalize_text changes, so entries keyed under the old rules are not reused.
+NORMALIZATION_VERSION = "2"
+
+
+def normalize_text(text: str) -> str:
+    # "I don't know." / "  I DON'T KNOW " both normalize to "i don't know". Only trailing sentence
+    # punctuation goes: "=A1*B1" and "=A1+B1", or "$A$1" and "A1", are different answers.
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    text = " ".join(text.split())
+    return re.sub(r"[\s.,;?!]+$", "", text)
+
+
+def evaluation_cache_key(question: str, answer: str) -> str:
+    # The prompt version is part of the key, so editing evaluator_prompt invalidates old entries.
+    raw = "\x00".join([NORMALIZATION_VERSION, prompt_version(evaluator_prompt), normalize_text(question), normalize_text(answer)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    memory_hits: int = 0
+    persistent_hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    expired: int = 0
+    evictions: int = 0
+
+
+class EvaluationCache:
+    def __init__(self, path: str = EVAL_CACHE_DB_PATH, ttl_seconds: int = EVAL_CACHE_TTL_SECONDS,
+                 memory_size: int = EVAL_CACHE_MEMORY_SIZE, max_rows: int = EVAL_CACHE_MAX_ROWS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.memory_size = memory_size
+        self.max_rows = max_rows
+        self.stats = CacheStats()
+        self._memory: OrderedDict[str, tuple[float, EvaluationResponse]] = OrderedDict()
+        self._conn: Optional[aiosqlite.Connection] = None
+        self._lock = asyncio.Lock()
+
+    async def _connection(self) -> aiosqlite.Connection:
+        if self._conn is None:
+            async with self._lock:
+                if self._conn is None:
+                    conn = await aiosqlite.connect(self.path, timeout=30)
+                    await conn.execute("PRAGMA journal_mode=WAL")
+                    await conn.execute("PRAGMA synchronous=NORMAL")
+                    await conn.execute(
+                        "CREATE TABLE IF NOT EXISTS evaluation_cache ("
+                        "key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL, last_used_at REAL NOT NULL)"
+                    )
+                    await conn.execute("CREATE INDEX IF NOT EXISTS ix_evaluation_cache_last_used_at ON evaluation_cache (last_used_at)")
+                    await conn.commit()
+                    self._conn = conn
+        return self._conn
+
+    def _remember(self, key: str, created_at: float, evaluation: EvaluationResponse):
+        self._memory[key] = (created_at, evaluation)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[EvaluationResponse]:
+        now = time.time()
+        cached = self._memory.get(key)
+        if cached is not None:
+            created_at, evaluation = cached
+            if now - created_at < self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self.stats.memory_hits += 1
+                return evaluation
+            del self._memory[key]
+
+        conn = await self._connection()
+        async with conn.execute("SELECT response, created_at FROM evaluation_cache WHERE key = ?", (key,)) as cursor:
+            row = await cursor.fetchone()
+        if row is None:
+            return None
+        response, created_at = row
+        if now - created_at >= self.ttl_seconds:
+            self.stats.expired += 1
+            await conn.execute("DELETE FROM evaluation_cache WHERE key = ?", (key,))
+            await conn.commit()
+            return None
+        await conn.execute("UPDATE evaluation_cache SET last_used_at = ? WHERE key = ?", (now, key))
+        await conn.commit()
+        evaluation = EvaluationResponse.model_validate_json(response)
+        self._remember(key, created_at, evaluation)
+        self.stats.persistent_hits += 1
+        return evaluation
+
+    async def put(self, key: str, evaluation: EvaluationResponse):
+        now = time.time()
+        self._remember(key, now, evaluation)
+        conn = await self._connection()
+        await conn.execute(
+            "INSERT OR REPLACE INTO evaluation_cache (key, response, created_at, last_used_at) VALUES (?, ?, ?, ?)",
+            (key, evaluation.model_dump_json(), now, now)
+        )
+        self.stats.stores += 1
+        if self.stats.stores % 100 == 0:
+            await self._evict(conn, now)
+        await conn.commit()
+
+    async def _evict(self, conn: aiosqlite.Connection, now: float):
+        cursor = await conn.execute("DELETE FROM evaluation_cache WHERE created_at <= ?", (now - self.ttl_seconds,))
+        self.stats.evictions += cursor.rowcount
+        cursor = await conn.execute(
+            "DELETE FROM evaluation_cache WHERE key IN ("
+            "SELECT key FROM evaluation_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_rows,)
+        )
+        self.stats.evictions += cursor.rowcount
+
+    async def evaluate(self, question: str, answer: str) -> EvaluationResponse:
+        key = evaluation_cache_key(question, answer)
+        with span("evaluation_cache get") as lookup_span:
+            cached = await self.get(key)
+            lookup_span.set_attribute("hit", cached is not None)
+        if cached is not None:
+            logger.debug("evaluation cache hit", extra={"key": key[:12]})
+            return cached
+
+        self.stats.misses += 1
+        evaluation = await evaluate_answer(question, answer)
+        await self.put(key, evaluation)
+        return evaluation
+
+    def summary(self) -> dict:
+        lookups = self.stats.memory_hits + self.stats.persistent_hits + self.stats.misses
+        hits = self.stats.memory_hits + self.stats.persistent_hits
+        return {
+            **asdict(self.stats),
+            "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+    async def close(self):
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+
+class NoEvaluationCache(EvaluationCache):
+    async def evaluate(self, question: str, answer: str) -> EvaluationResponse:
+        self.stats.misses += 1
+        return await evaluate_answer(question, answer)
+
+
+def create_evaluation_cache() -> EvaluationCache:
+    return EvaluationCache() if EVAL_CACHE_ENABLED else NoEvaluationCache()
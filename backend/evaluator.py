@@ -1,25 +1,45 @@
 from __future__ import annotations as _annotations
+import logging
 from pydantic_ai import Agent
 from models import State, EvaluationResponse, FinalReport
-from prompt import evaluator_prompt, final_report_prompt
+from prompt import evaluator_prompt, final_report_prompt, prompt_cache_settings
+from usage_stats import record_usage, response_model_name
+from metrics import LLM_CALL_SECONDS
+from tracing import span
 from dotenv import load_dotenv
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 evaluator_agent = Agent(
     "openai:gpt-4o-mini",
     output_type=EvaluationResponse,
-    system_prompt=evaluator_prompt
+    system_prompt=evaluator_prompt,
+    model_settings=prompt_cache_settings("evaluator", evaluator_prompt)
 )
 
 final_report_agent = Agent(
     "openai:gpt-4o-mini",
     output_type=FinalReport,
-    system_prompt=final_report_prompt
+    system_prompt=final_report_prompt,
+    model_settings=prompt_cache_settings("final_report", final_report_prompt)
 )
 
-async def generate_interview_summary(session_id: str, state: State, evaluation_data: list[EvaluationResponse]) -> FinalReport:
+async def evaluate_answer(question: str, answer: str) -> EvaluationResponse:
+    evaluation_input = f"Question: {question}\nAnswer: {answer}"
+    with span("agent evaluator"), LLM_CALL_SECONDS.labels("evaluator").time():
+        result = await evaluator_agent.run(
+            evaluation_input,
+            message_history=[],
+        )
+    record_usage("evaluator", result.usage(), response_model_name(result.new_messages()))
+    return result.output
+
+async def generate_interview_summary(session_id: str, state: State, evaluation_data: list[EvaluationResponse], fallback: bool = True) -> FinalReport:
     
-    conversation_context = f"Generate a comprehensive interview summary for session {session_id}.\n\n"
+    # Fixed wording first and the session-specific data last, so the request prefix is the
+    # same for every interview.
+    conversation_context = "Generate a comprehensive interview summary from the interview data below.\n\n"
     conversation_context += f"Candidate provided {len(state.user_answers)} answers during the interview.\n\n"
     
     for i, answer in enumerate(state.user_answers):
@@ -35,20 +55,25 @@ async def generate_interview_summary(session_id: str, state: State, evaluation_d
         for i, eval_data in enumerate(evaluation_data):
             conversation_context += f"Evaluation {i+1}: Score {eval_data.score}/10 - {eval_data.comments}\n"
     
-    print(f"📊 Generating comprehensive interview summary for session: {session_id}")
+    conversation_context += f"\nSession ID: {session_id}\n"
+    
     try:
-        result = await final_report_agent.run(
-            conversation_context,
-            message_history=[],
-        )
+        with span("agent final_report", session_id=session_id), LLM_CALL_SECONDS.labels("final_report").time():
+            result = await final_report_agent.run(
+                conversation_context,
+                message_history=[],
+            )
+        record_usage("final_report", result.usage(), response_model_name(result.new_messages()))
         
         from datetime import datetime
         result.output.generated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
-        print(f"✅ Interview summary generated successfully")
+        logger.info("interview summary generated", extra={"session_id": session_id})
         return result.output
     except Exception as e:
-        print(f"❌ Error generating interview summary: {e}")
+        logger.warning("interview summary failed", extra={"session_id": session_id, "error": str(e)})
+        if not fallback:
+            raise
         from datetime import datetime
         avg_score = sum(eval_data.score for eval_data in evaluation_data) / len(evaluation_data) if evaluation_data else 0
         
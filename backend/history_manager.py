@@ -0,0 +1,101 @@
+import json
+import logging
+import os
+from dataclasses import dataclass
+from pydantic_ai.messages import (
+    ModelMessage, ModelRequest, SystemPromptPart, UserPromptPart, TextPart, ToolCallPart,
+)
+from models import State
+
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "6000"))
+HISTORY_KEEP_EXCHANGES = int(os.getenv("HISTORY_KEEP_EXCHANGES", "4"))
+HISTORY_SUMMARY_MAX_CHARS = int(os.getenv("HISTORY_SUMMARY_MAX_CHARS", "4000"))
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PREFIX = "Summary of the earlier part of this interview (older turns were condensed):\n"
+
+
+def part_text(part) -> str:
+    if isinstance(part, ToolCallPart):
+        return part.args if isinstance(part.args, str) else json.dumps(part.args or {})
+    content = getattr(part, "content", "")
+    return content if isinstance(content, str) else json.dumps(content, default=str)
+
+
+def estimate_tokens(messages: list[ModelMessage]) -> int:
+    # Roughly four characters per token for English text; good enough to enforce a budget.
+    return sum(len(part_text(part)) for message in messages for part in message.parts) // 4
+
+
+def is_exchange_start(message: ModelMessage) -> bool:
+    return isinstance(message, ModelRequest) and any(isinstance(part, UserPromptPart) for part in message.parts)
+
+
+def split_exchanges(messages: list[ModelMessage]) -> tuple[list[SystemPromptPart], list[list[ModelMessage]]]:
+    # An exchange starts at a user prompt and runs until the next one, so tool calls and
+    # their returns always stay together.
+    system_parts = []
+    exchanges: list[list[ModelMessage]] = []
+    for index, message in enumerate(messages):
+        if is_exchange_start(message) or not exchanges:
+            exchanges.append([])
+        if index == 0 and isinstance(message, ModelRequest):
+            system_parts = [part for part in message.parts if isinstance(part, SystemPromptPart) and not part.content.startswith(SUMMARY_PREFIX)]
+            message = ModelRequest(parts=[part for part in message.parts if not isinstance(part, SystemPromptPart)])
+            if not message.parts:
+                continue
+        exchanges[-1].append(message)
+    return system_parts, [exchange for exchange in exchanges if exchange]
+
+
+def summarize_exchange(exchange: list[ModelMessage]) -> str:
+    lines = []
+    for message in exchange:
+        for part in message.parts:
+            if isinstance(part, UserPromptPart) and isinstance(part.content, str):
+                lines.append(f"- Context: {part.content[:200]}")
+            elif isinstance(part, ToolCallPart):
+                args = part.args_as_dict()
+                if args.get("question"):
+                    lines.append(f"- Interviewer: {args['question'][:200]}")
+                elif "score" in args:
+                    lines.append(f"- Evaluation: score {args['score']}, {str(args.get('comments', ''))[:150]}")
+            elif isinstance(part, TextPart):
+                lines.append(f"- Interviewer: {part.content[:200]}")
+    return "\n".join(lines)
+
+
+@dataclass
+class HistoryManager:
+    token_budget: int = HISTORY_TOKEN_BUDGET
+    keep_exchanges: int = HISTORY_KEEP_EXCHANGES
+    summary_max_chars: int = HISTORY_SUMMARY_MAX_CHARS
+
+    def compact(self, state: State) -> int:
+        # Folds everything but the system prompt and the last `keep_exchanges` exchanges into
+        # state.history_summary once the history is over budget. Returns the tokens saved.
+        before = estimate_tokens(state.history)
+        if before <= self.token_budget:
+            return 0
+
+        system_parts, exchanges = split_exchanges(state.history)
+        if len(exchanges) <= self.keep_exchanges:
+            return 0
+        split = len(exchanges) - self.keep_exchanges
+        folded, kept = exchanges[:split], exchanges[split:]
+
+        summary = "\n".join(filter(None, [state.history_summary] + [summarize_exchange(exchange) for exchange in folded]))
+        if len(summary) > self.summary_max_chars:
+            summary = summary[-self.summary_max_chars:]
+            summary = summary[summary.find("\n") + 1:]
+        state.history_summary = summary
+
+        head = ModelRequest(parts=system_parts + [SystemPromptPart(content=SUMMARY_PREFIX + summary)])
+        state.history = [head] + [message for exchange in kept for message in exchange]
+        after = estimate_tokens(state.history)
+        logger.debug("compacted history", extra={"folded_exchanges": len(folded), "tokens_before": before, "tokens_after": after})
+        return before - after
+
+
+history_manager = HistoryManager()
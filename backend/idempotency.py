@@ -0,0 +1,60 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Optional
+from session_store import SessionBackend
+
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_SWEEP_INTERVAL_SECONDS = 60
+KEY_PREFIX = "idempotency-"
+
+logger = logging.getLogger(__name__)
+
+
+def request_fingerprint(payload: dict) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+class IdempotencyStore:
+    # Completed turn responses keyed by the client's Idempotency-Key, kept in the session
+    # backend so a retry that lands on another worker is still replayed. Keys are scoped to
+    # the session they were sent for; starts use an empty scope.
+    def __init__(self, backend: SessionBackend, ttl_seconds: int = IDEMPOTENCY_TTL_SECONDS):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self._last_sweep = 0.0
+
+    def _key(self, scope: str, idempotency_key: str) -> str:
+        digest = hashlib.sha256(f"{scope}\n{idempotency_key}".encode("utf-8")).hexdigest()
+        return f"{KEY_PREFIX}{digest}"
+
+    async def get(self, scope: str, idempotency_key: str) -> Optional[dict]:
+        key = self._key(scope, idempotency_key)
+        stored = await self.backend.get(key)
+        if stored is None:
+            return None
+        record = json.loads(stored[1])
+        if time.time() - record["created_at"] > self.ttl_seconds:
+            await self.backend.delete(key)
+            return None
+        return record
+
+    async def put(self, scope: str, idempotency_key: str, fingerprint: str, response: dict) -> None:
+        record = {"fingerprint": fingerprint, "response": response, "created_at": time.time()}
+        await self.backend.put(self._key(scope, idempotency_key), json.dumps(record, separators=(",", ":")).encode("utf-8"))
+        logger.debug("idempotent response stored", extra={"scope": scope})
+        await self.sweep()
+
+    async def sweep(self, force: bool = False) -> int:
+        # Most keys are never sent again (clients use a new one per turn), so expired records
+        # are swept here rather than on lookup; at most once per interval per worker.
+        now = time.time()
+        if not force and now - self._last_sweep < IDEMPOTENCY_SWEEP_INTERVAL_SECONDS:
+            return 0
+        self._last_sweep = now
+        removed = await self.backend.delete_expired(KEY_PREFIX, now - self.ttl_seconds)
+        if removed:
+            logger.info("expired idempotency records removed", extra={"count": removed})
+        return removed
@@ -1,54 +1,171 @@
 from __future__ import annotations as _annotations
+import logging
 from dataclasses import dataclass
+from typing import Callable, Optional
 from pydantic_ai import Agent
+from pydantic_ai.messages import ModelRequest, ModelResponse, TextPart, ToolCallPart, UserPromptPart
+from pydantic_ai.usage import RunUsage
+from pydantic_core import from_json
 from pydantic_graph import BaseNode, GraphRunContext, End
 from models import State, InterviewerResponse
-from prompt import interviewer_prompt
+from prompt import interviewer_prompt, interviewer_turn_guidance, prompt_cache_settings
+from usage_stats import record_usage, response_model_name, budget_exhausted
+from history_manager import history_manager, estimate_tokens
+from question_bank import question_bank, BankEntry
+from model_router import model_router
+from metrics import LLM_CALL_SECONDS
+from tracing import span
 from dotenv import load_dotenv
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 
 interviewer_agent = Agent(
     "openai:gpt-4o",
     output_type=InterviewerResponse,
-    system_prompt=interviewer_prompt
+    system_prompt=(interviewer_prompt, interviewer_turn_guidance),
+    model_settings=prompt_cache_settings("interviewer", interviewer_prompt, interviewer_turn_guidance)
 )
 
+BUDGET_WRAP_UP_MESSAGE = "Thank you, that brings us to the end of the interview. Your assessment report is being prepared now."
+
+INTRODUCTION_CONTEXT = "This is Phase 1 - INTRODUCTION. Provide a warm introduction as Dhruv, explain the interview process, mention the final report, and end with 'Ready to get started?' Do NOT ask any Excel questions yet. This is just the introduction phase."
+
+
+def build_context_message(state: State) -> str:
+    # Only the facts that change between turns go here; the static guidance lives in the
+    # system prompt so every request shares the same cacheable prefix.
+    if len(state.user_answers) == 0:
+        return INTRODUCTION_CONTEXT
+    
+    lines = [f"Answers so far: {len(state.user_answers)}"]
+    lines.append(f"Most recent answer: '{state.user_answers[-1].text[:100]}...'")
+    if state.feedback_history:
+        lines.append(f"Most recent feedback: '{state.feedback_history[-1].text[:100]}...'")
+    return "\n".join(lines)
+
+
+def partial_question(response: ModelResponse) -> str:
+    for part in response.parts:
+        if isinstance(part, ToolCallPart):
+            args = part.args
+            if isinstance(args, str):
+                try:
+                    args = from_json(args, allow_partial="trailing-strings")
+                except ValueError:
+                    return ""
+            if isinstance(args, dict) and isinstance(args.get("question"), str):
+                return args["question"]
+    return ""
+
 
 @dataclass
 class Interviewer(BaseNode[State]):
+    # When set, the question text is streamed token by token into this callback.
+    token_sink: Optional[Callable[[str], None]] = None
 
     async def run(self, ctx: GraphRunContext[State]) -> "End[InterviewerResponse]":
-        print(f"Interviewer.run() called - Answers: {len(ctx.state.user_answers)}, Feedback: {len(ctx.state.feedback_history)}")
+        with span("node Interviewer", answers=len(ctx.state.user_answers)) as node_span:
+            if budget_exhausted(ctx.state):
+                # Closing without another LLM call: the budget is already spent.
+                node_span.set_attribute("source", "budget")
+                logger.info("session budget exhausted, wrapping up", extra={
+                    "tokens_used": ctx.state.tokens_used, "cost_usd": round(ctx.state.cost_usd, 6)
+                })
+                return End(InterviewerResponse(question=BUDGET_WRAP_UP_MESSAGE, difficulty=None, finished=True))
+        
+            context_message = build_context_message(ctx.state)
         
-        if len(ctx.state.user_answers) == 0:
-            context_message = "This is Phase 1 - INTRODUCTION. Provide a warm introduction as Dhruv, explain the interview process, mention the final report, and end with 'Ready to get started?' Do NOT ask any Excel questions yet. This is just the introduction phase."
-            print("First question - sending introduction context")
-        else:
-            context_message = f"Continue the interview conversation. You have {len(ctx.state.user_answers)} previous answers from the candidate."
-            
-            if ctx.state.user_answers:
-                recent_answer = ctx.state.user_answers[-1].text
-                context_message += f" The candidate's most recent answer was: '{recent_answer[:100]}...'"
-            
-            if ctx.state.feedback_history:
-                recent_feedback = ctx.state.feedback_history[-1].text
-                context_message += f" The most recent feedback was: '{recent_feedback[:100]}...'"
-            
-            context_message += " Use this context to ask a natural follow-up question that builds on the conversation. Be conversational and reference their previous answers when appropriate."
-            print(f"Continue interview - sending context: {context_message}")
+            bank_entry = question_bank.pick(ctx.state)
+            if bank_entry is not None:
+                node_span.set_attribute("source", "bank")
+                return End(self.serve_bank_question(bank_entry, context_message, ctx.state))
         
-        print(f"Sending to interviewer_agent: {context_message}")
-        result = await interviewer_agent.run(
-            context_message,
-            message_history=ctx.state.history,
-        )
-        ctx.state.history += result.new_messages()
-        print(f"Received from interviewer_agent: {result.output}")
+            history_tokens = estimate_tokens(ctx.state.history)
+            saved_tokens = history_manager.compact(ctx.state)
         
-        if result.output.finished:
-            print("Interviewer marked interview as finished")
-            return End(result.output)
+            route = model_router.route(ctx.state)
+            node_span.set_attributes({"source": "llm", "phase": route.phase})
+            streamed = []
+            if self.token_sink is not None:
+                def sink(token: str):
+                    streamed.append(token)
+                    self.token_sink(token)
+                output, usage = await model_router.run(
+                    route,
+                    lambda model: self.stream_question(context_message, ctx.state, model, sink),
+                    can_retry=lambda: not streamed,
+                )
+            else:
+                output, usage = await model_router.run(
+                    route,
+                    lambda model: self.ask_question(context_message, ctx.state, model),
+                )
+            record_usage("interviewer", usage, response_model_name(ctx.state.history))
         
-        print(f"Returning response - Question: {result.output.question[:50] if result.output.question else 'None'}..., Finished: {result.output.finished}")
-        return End(result.output)
+            turn_tokens = {
+                "turn": len(ctx.state.user_answers),
+                "history_tokens_estimated": history_tokens,
+                "history_tokens_saved": saved_tokens,
+                "input_tokens": usage.input_tokens,
+                "cache_read_tokens": usage.cache_read_tokens,
+                "output_tokens": usage.output_tokens,
+                "source": "llm",
+                "model": route.model,
+                "phase": route.phase,
+                "latency_ms": round(route.latency_ms, 1),
+            }
+            ctx.state.token_usage.append(turn_tokens)
+            node_span.set_attribute("model", route.model or "default")
+            logger.debug("interviewer turn", extra=turn_tokens)
+            return End(output)
+
+    def serve_bank_question(self, entry: BankEntry, context_message: str, state: State) -> InterviewerResponse:
+        # Recorded in the history as if the interviewer had said it, so the LLM's follow-up
+        # on the next turn can build on the question and the candidate's answer.
+        logger.debug("serving bank question", extra={"bank_question_id": entry.id, "topic": entry.topic, "difficulty": entry.difficulty})
+        output = InterviewerResponse(question=entry.text, difficulty=entry.difficulty, finished=False)
+        state.history += [
+            ModelRequest(parts=[UserPromptPart(content=context_message)]),
+            ModelResponse(parts=[TextPart(content=entry.text)]),
+        ]
+        state.token_usage.append({
+            "turn": len(state.user_answers),
+            "source": "bank",
+            "bank_question_id": entry.id,
+        })
+        if self.token_sink is not None:
+            self.token_sink(entry.text)
+        return output
+
+    async def ask_question(self, context_message: str, state: State, model: Optional[str]) -> tuple[InterviewerResponse, RunUsage]:
+        with span("agent interviewer", model=model), LLM_CALL_SECONDS.labels("interviewer").time():
+            result = await interviewer_agent.run(
+                context_message,
+                message_history=state.history,
+                model=model,
+            )
+        state.history += result.new_messages()
+        return result.output, result.usage()
+
+    async def stream_question(self, context_message: str, state: State, model: Optional[str],
+                              token_sink: Callable[[str], None]) -> tuple[InterviewerResponse, RunUsage]:
+        sent = ""
+        with span("agent interviewer", model=model, streamed=True), LLM_CALL_SECONDS.labels("interviewer").time():
+            async with interviewer_agent.run_stream(context_message, message_history=state.history, model=model) as result:
+                # Required fields after "question" are still missing mid-stream, so the output
+                # model can't be validated yet; read the question from the partial tool-call JSON.
+                response = None
+                async for response, _ in result.stream_responses(debounce_by=None):
+                    question = partial_question(response)
+                    if len(question) > len(sent) and question.startswith(sent):
+                        token_sink(question[len(sent):])
+                        sent = question
+                # get_output() would record the tool call and its return a second time after
+                # the stream was drained; validating the last response keeps one pair.
+                output = await result.validate_response_output(response)
+        if output.question and output.question != sent and output.question.startswith(sent):
+            token_sink(output.question[len(sent):])
+        state.history += result.new_messages()
+        return output, result.usage()
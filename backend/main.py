@@ -1,39 +1,115 @@
-from fastapi import FastAPI, HTTPException, Depends
-from fastapi.responses import Response
+from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Header
+from fastapi.responses import Response, JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from pydantic_graph import Graph
 from contextlib import asynccontextmanager
+from typing import Literal
+import asyncio
+import json
+import logging
+import os
 import uuid
 from datetime import datetime
 from interviewer import Interviewer
-from evaluator import evaluator_agent, generate_interview_summary
-from models import State, Answer, Feedback,  Question
-from pdf_gen import generate_pdf_bytes
-from database import get_db, init_database
-from db_operations import DatabaseOperations
+from evaluation_cache import create_evaluation_cache
+from question_bank import question_bank
+from model_router import model_router
+from models import State, Answer, Feedback,  Question, EvaluationResponse
+from pdf_cache import PdfCache, PDF_CACHE_MAX_AGE
+from database import get_db, init_database, close_database, AsyncSessionLocal
+from db_operations import AsyncDatabaseOperations, create_turn_writer
+from session_store import create_session_store, SessionLocks
+from idempotency import IdempotencyStore, request_fingerprint
+from conversation import append_entry, session_version, entries_since
+from usage_stats import prompt_cache_summary, capture_usage, session_budget, SESSION_TOKEN_BUDGET, SESSION_COST_BUDGET_USD
+from report_formats import ReportRenderer, report_format_key, REPORT_MEDIA_TYPES, REPORT_EXTENSIONS
+from report_export import ReportExporter, EXPORT_MAX_SESSIONS
+from report_jobs import run_report_job, load_report, mark_report_pending, REPORT_PENDING, REPORT_FAILED
+from logging_config import configure_logging
+from metrics import RequestMetricsMiddleware, TURNS_IN_PROGRESS, touch_session, end_session, metrics_payload
+from tracing import TracingMiddleware, TRACING_ENABLED, configure_tracing, shutdown_tracing, set_turn_context
+
+configure_logging()
+if TRACING_ENABLED:
+    configure_tracing()
+logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_database()
-    print("Database initialized successfully")
+    logger.info("database initialized")
+    if question_bank.enabled:
+        question_bank.load()
+    await turn_writer.start()
     yield
-    print("Database closed successfully")
+    await turn_writer.close()
+    await evaluation_cache.close()
+    await session_store.close()
+    await close_database()
+    logger.info("database closed")
+    shutdown_tracing()
 
 app = FastAPI(title="Mock Interview API", version="1.0.0" , lifespan=lifespan)
-sessions = {}
+app.add_middleware(RequestMetricsMiddleware)
+app.add_middleware(TracingMiddleware)
+session_store = create_session_store()
+session_locks = SessionLocks()
+idempotency_store = IdempotencyStore(session_store.backend)
+turn_writer = create_turn_writer()
+evaluation_cache = create_evaluation_cache()
+pdf_cache = PdfCache()
+report_exporter = ReportExporter(session_store, pdf_cache)
+report_renderer = ReportRenderer(pdf_cache)
+PIPELINED_TURNS = os.getenv("PIPELINED_TURNS", "false").lower() in ("1", "true", "yes")
 
 class InterviewRequest(BaseModel):
     session_id: str = None
     user_input: str = None
+    pipelined: bool | None = None
+    since: int | None = None
+    # Only read when a session starts; capped by SESSION_TOKEN_BUDGET / SESSION_COST_BUDGET_USD.
+    token_budget: int | None = None
+    cost_budget_usd: float | None = None
 
 interview_graph = Graph(nodes=(Interviewer,))
 
+def merge_evaluation(session: dict, evaluation_data: EvaluationResponse):
+    # The evaluator's messages are deliberately not added to state.history: they carry their
+    # own system prompt and would break the interviewer's cacheable prefix. The interviewer
+    # sees the feedback through its per-turn context message instead.
+    state = session["state"]
+    state.feedback_history.append(Feedback(text=evaluation_data.comments))
+    state.scores.append(evaluation_data.score)
+    session.setdefault("evaluation_data", []).append(evaluation_data)
+    logger.debug("answer evaluated", extra={"score": evaluation_data.score, "feedback_count": len(state.feedback_history)})
+
+def interview_response(session_id: str, session: dict, message: str, since: int | None = None) -> dict:
+    # With `since`, only the entries added after that version are returned.
+    return {
+        "session_id": session_id,
+        "message": message,
+        "finished": session["finished"],
+        "version": session_version(session),
+        "conversation_history": entries_since(session, since)
+    }
+
 @app.get("/interview/{session_id}")
-async def get_interview_state(session_id: str):
-    if session_id not in sessions:
+async def get_interview_state(session_id: str, since: int | None = None, if_none_match: str | None = Header(default=None)):
+    set_turn_context(session_id)
+    session = await session_store.get(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    session = sessions[session_id]
+    # Every change a client can see adds a conversation entry, so the version alone
+    # identifies the state.
+    version = session_version(session)
+    etag = f'"{version}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if (since is not None and since >= version) or (
+        if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]
+    ):
+        return Response(status_code=304, headers=headers)
+    
     state = session["state"]
     
     last_output = session["last_output"]
@@ -45,133 +121,98 @@ async def get_interview_state(session_id: str):
     else:
         message = "Waiting for your response..."
     
-    return {
-        "session_id": session_id,
-        "message": message,
-        "finished": session["finished"],
-        "conversation_history": [
-            {"type": "question", "content": f"Question {i+1}"} if i % 2 == 0 
-            else {"type": "answer", "content": answer.text}
-            for i, answer in enumerate(state.user_answers)
-        ],
-        "debug_info": {
-            "total_answers": len(state.user_answers),
-            "total_feedback": len(state.feedback_history),
-            "total_questions": len(session.get("questions", []))
-        }
+    content = interview_response(session_id, session, message, since)
+    content["debug_info"] = {
+        "total_answers": len(state.user_answers),
+        "total_feedback": len(state.feedback_history),
+        "total_questions": len(session.get("questions", [])),
+        "token_usage": state.token_usage,
+        "tokens_used": state.tokens_used,
+        "cost_usd": round(state.cost_usd, 6),
+        "token_budget": state.token_budget,
+        "cost_budget_usd": state.cost_budget_usd
     }
+    return JSONResponse(content=content, headers=headers)
 
-@app.post("/interview/")
-async def interview(req: InterviewRequest, db = Depends(get_db)):
-    
+async def run_interview_turn(req: InterviewRequest, background_tasks: BackgroundTasks, interviewer: Interviewer) -> dict:
+    with TURNS_IN_PROGRESS.track_inprogress():
+        try:
+            return await interview_turn(req, background_tasks, interviewer)
+        except BaseException:
+            # A turn changes the cached session in place before its LLM calls; if it fails
+            # those changes must not outlive it, so the next read reloads the saved version.
+            if req.session_id:
+                session_store.evict(req.session_id)
+            raise
+
+async def interview_turn(req: InterviewRequest, background_tasks: BackgroundTasks, interviewer: Interviewer) -> dict:
     if not req.session_id:
-        print("🔄 Starting new interview...")
         session_id = str(uuid.uuid4())
-        state = State()  # Fresh state with no answers or feedback
-        print(f"Created new session: {session_id}")
-        print(f"Initial state - Answers: {len(state.user_answers)}, Feedback: {len(state.feedback_history)}")
-        
-        print("Running interviewer node...")
-        result = await interview_graph.run(Interviewer(), state=state)
-        print(f"Interviewer result: {result.output}")
+        set_turn_context(session_id, 0)
+        state = State(
+            token_budget=session_budget(SESSION_TOKEN_BUDGET, req.token_budget),
+            cost_budget_usd=session_budget(SESSION_COST_BUDGET_USD, req.cost_budget_usd)
+        )
+        turn_usage = capture_usage(state)
+        result = await interview_graph.run(interviewer, state=state)
         
         if result.output.question:
             current_question = Question(text=result.output.question)
         else:
             current_question = Question(text="No question provided")
         
-        db_ops = DatabaseOperations(db)
-        
-        db_session = db_ops.create_session(session_id)
-        
-        db_question = db_ops.save_question(
-            session_id=session_id,
-            question_text=result.output.question or "Introduction",
-            difficulty=result.output.difficulty,
-            question_order=1
-        )
+        await turn_writer.start_session(session_id, result.output, usage=turn_usage)
         
-        sessions[session_id] = {
-            "graph": interview_graph,
+        session = {
             "state": state,
             "finished": result.output.finished,
             "last_output": result.output,
             "current_question": current_question,
             "questions": [result.output],
-            "db_ops": db_ops,
-            "db_question_id": db_question.id
+            "conversation": []
         }
+        if result.output.question:
+            append_entry(session, "question", result.output.question)
+        await session_store.save(session_id, session)
         
-        print(f"Session saved with {len(sessions)} total sessions")
-        return {
-            "session_id": session_id, 
-            "message": result.output.question or "Interview started",
-            "finished": result.output.finished,
-            "conversation_history": []
-        }
+        if not result.output.finished:
+            touch_session(session_id)
+        logger.info("session started", extra={"session_id": session_id})
+        return interview_response(session_id, session, result.output.question or "Interview started")
     
-    if req.session_id not in sessions:
-        print(f"❌ Session not found: {req.session_id}")
+    session = await session_store.get(req.session_id)
+    if session is None:
+        logger.warning("session not found", extra={"session_id": req.session_id})
         raise HTTPException(status_code=404, detail="Session not found")
     
-    print(f"Continuing session: {req.session_id}")
-    session = sessions[req.session_id]
     state = session["state"]
-    print(f"Current state - Answers: {len(state.user_answers)}, Feedback: {len(state.feedback_history)}")
+    set_turn_context(req.session_id, len(state.user_answers) + (1 if req.user_input else 0))
     
     if req.user_input:
-        print(f"User input received: {req.user_input[:50]}...")
+        turn_usage = capture_usage(state)
         answer = Answer(req.user_input)
         state.user_answers.append(answer)
-        print(f"Added answer. Total answers: {len(state.user_answers)}")
+        append_entry(session, "answer", answer.text)
         
         current_question = session.get("current_question")
         if not current_question:
-            print("No current question found in session")
+            logger.warning("no current question", extra={"session_id": req.session_id})
             raise HTTPException(status_code=400, detail="No current question found")
         
-        print(f"Current question: {current_question.text[:50] if current_question.text else 'None'}...")
-        
-        print("Evaluating answer...")
-        
-        evaluation_input = f"Question: {current_question.text}\nAnswer: {answer.text}"
-        print(f"Evaluation input: {evaluation_input[:100]}...")
-        
-        evaluation_result = await evaluator_agent.run(
-            evaluation_input,
-            message_history=[],
-        )
-        state.history += evaluation_result.new_messages()
-        print(f"Evaluation result: {evaluation_result.output}")
-        
-        evaluation_data = evaluation_result.output
-        feedback = Feedback(text=evaluation_data.comments)
-        state.feedback_history.append(feedback)
-        
-        if "evaluation_data" not in session:
-            session["evaluation_data"] = []
-        session["evaluation_data"].append(evaluation_data)
-        
-        db_ops = session.get("db_ops")
-        if db_ops:
-            db_answer = db_ops.save_answer(
-                session_id=req.session_id,
-                question_id=session.get("db_question_id"),
-                answer_text=answer.text
-            )
-            
-            db_ops.save_evaluation(
-                session_id=req.session_id,
-                question_id=session.get("db_question_id"),
-                answer_id=db_answer.id,
-                evaluation=evaluation_data
+        pipelined = PIPELINED_TURNS if req.pipelined is None else req.pipelined
+        if pipelined:
+            # The interviewer only needs the answer, not its score, so both LLM calls run
+            # concurrently and the feedback is merged once the evaluation arrives.
+            evaluation_data, next_result = await asyncio.gather(
+                evaluation_cache.evaluate(current_question.text, answer.text),
+                interview_graph.run(interviewer, state=state),
             )
+            merge_evaluation(session, evaluation_data)
+        else:
+            evaluation_data = await evaluation_cache.evaluate(current_question.text, answer.text)
+            merge_evaluation(session, evaluation_data)
+            next_result = await interview_graph.run(interviewer, state=state)
         
-        print(f"Saved feedback. Total feedback: {len(state.feedback_history)}")
-        
-        
-        print("Asking next question...")
-        next_result = await session["graph"].run(Interviewer(), state=state)
         session["last_output"] = next_result.output
         
         if next_result.output.question:
@@ -181,248 +222,242 @@ async def interview(req: InterviewRequest, db = Depends(get_db)):
         
         session["current_question"] = current_question
         session["questions"].append(next_result.output)
+        if next_result.output.question:
+            append_entry(session, "question", next_result.output.question)
         
-        if db_ops and next_result.output.question:
-            db_question = db_ops.save_question(
-                session_id=req.session_id,
-                question_text=next_result.output.question,
-                difficulty=next_result.output.difficulty,
-                question_order=len(session["questions"])
-            )
-            session["db_question_id"] = db_question.id
+        await turn_writer.save_turn(
+            session_id=req.session_id,
+            question_order=len(session["questions"]) - 1,
+            answer_text=answer.text,
+            evaluation=evaluation_data,
+            next_question=next_result.output,
+            evaluation_usage=[record for record in turn_usage if record.agent == "evaluator"],
+            question_usage=[record for record in turn_usage if record.agent == "interviewer"]
+        )
         
-        print(f" Next question: {next_result.output}")
+        logger.info("turn completed", extra={
+            "session_id": req.session_id,
+            "turn": len(state.user_answers),
+            "score": evaluation_data.score,
+            "pipelined": pipelined,
+            "finished": next_result.output.finished
+        })
         
         if next_result.output.finished:
-            print(" Interview completed by interviewer")
+            end_session(req.session_id)
             session["finished"] = True
             
-            evaluation_data = session.get("evaluation_data", [])
-            if evaluation_data:
-                print(" Generating comprehensive interview summary...")
-                final_report = await generate_interview_summary(
-                    session_id=req.session_id,
-                    state=state,
-                    evaluation_data=evaluation_data
-                )
-                
-                session["final_report"] = final_report
-                
-                if db_ops:
-                    avg_score = sum(eval_data.score for eval_data in evaluation_data) / len(evaluation_data)
-                    db_ops.finish_session(
-                        session_id=req.session_id,
-                        average_score=avg_score,
-                        overall_performance=final_report.overall_performance
-                    )
-            return {
-                "session_id": req.session_id,
-                "message": next_result.output.question or "Interview completed",
-                "finished": True,
-                "conversation_history": [
-                    {"type": "question", "content": f"Question {i+1}"} if i % 2 == 0 
-                    else {"type": "answer", "content": answer.text}
-                    for i, answer in enumerate(state.user_answers)
-                ]
-            }
-        
-        print(" Continuing interview...")
-        return {
-            "session_id": req.session_id,
-            "message": next_result.output.question or "Next question",
-            "finished": False,
-            "conversation_history": [
-                {"type": "question", "content": f"Question {i+1}"} if i % 2 == 0 
-                else {"type": "answer", "content": answer.text}
-                for i, answer in enumerate(state.user_answers)
-            ]
-        }
-    return {
-        "session_id": req.session_id,
-        "message": "Waiting for your response...",
-        "finished": session["finished"],
-        "conversation_history": [
-            {"type": "question", "content": f"Question {i+1}"} if i % 2 == 0 
-            else {"type": "answer", "content": answer.text}
-            for i, answer in enumerate(state.user_answers)
-        ]
-    }
-
-@app.get("/report/{session_id}")
-async def get_pdf_report(session_id: str):
-    print(f" Generating PDF report for session: {session_id}")
-    
-    if session_id not in sessions:
-        print(f" Session not found: {session_id}")
-        raise HTTPException(status_code=404, detail="Session not found")
-
-    session = sessions[session_id]
-    state = session["state"]
-    stored_questions = session.get("questions", [])
-    
-    print(f" Report data - Questions: {len(stored_questions)}, Answers: {len(state.user_answers)}, Feedback: {len(state.feedback_history)}")
-
-    transcript = []
-    
-    for i, (question, answer, feedback) in enumerate(zip(
-        stored_questions,
-        state.user_answers,
-        state.feedback_history
-    ), 1):
-        if hasattr(question, 'question'):
-            question_text = question.question if question.question else f"Question {i}"
-            print(f" Processing Q&A pair {i}: {question_text[:30]}...")
-        else:
-            question_text = question.text if question else f"Question {i}"
-            print(f" Processing Q&A pair {i}: {question_text[:30]}...")
+            # The summary LLM call and PDF render run after the response is sent;
+            # clients poll /report/{session_id}/status until the report is ready.
+            mark_report_pending(session)
+            background_tasks.add_task(run_report_job, session_store, turn_writer, pdf_cache, req.session_id)
+            await session_store.save(req.session_id, session)
+            return interview_response(req.session_id, session, next_result.output.question or "Interview completed", req.since)
         
-        transcript.append({
-            "kind": "question",
-            "payload": question_text
-        })
-        
-        transcript.append({
-            "kind": "answer", 
-            "payload": answer.text
-        })
-        
-        evaluation_data = session.get("evaluation_data", [])
-        if i <= len(evaluation_data):
-            eval_data = evaluation_data[i-1]
-            transcript.append({
-                "kind": "evaluation",
-                "payload": {
-                    "score": eval_data.score,
-                    "comments": eval_data.comments,
-                    "detailed_report": eval_data.detailed_report
-                }
-            })
-        else:
-            transcript.append({
-                "kind": "evaluation",
-                "payload": {
-                    "score": 7.5,
-                    "comments": feedback.text,
-                    "detailed_report": {
-                        "executive_summary": "Evaluation data not available",
-                        "technical_competency": "Unable to assess",
-                        "practical_application": "Unable to assess",
-                        "communication_skills": "Unable to assess",
-                        "strengths": ["Unable to assess"],
-                        "areas_for_improvement": ["Unable to assess"],
-                        "recommendations": ["Unable to assess"]
-                    }
-                }
-            })
+        touch_session(req.session_id)
+        await session_store.save(req.session_id, session)
+        return interview_response(req.session_id, session, next_result.output.question or "Next question", req.since)
+    return interview_response(req.session_id, session, "Waiting for your response...", req.since)
 
-    evaluation_data = session.get("evaluation_data", [])
-    print(f"Evaluation data: {evaluation_data}")
-    if evaluation_data:
-        avg_score = sum(eval_data.score for eval_data in evaluation_data) / len(evaluation_data)
-        all_strengths = []
-        all_weaknesses = []
-        all_recommendations = []
-        
-        for eval_data in evaluation_data:
-            if eval_data.detailed_report and "strengths" in eval_data.detailed_report:
-                all_strengths.extend(eval_data.detailed_report["strengths"])
-            if eval_data.detailed_report and "areas_for_improvement" in eval_data.detailed_report:
-                all_weaknesses.extend(eval_data.detailed_report["areas_for_improvement"])
-            if eval_data.detailed_report and "recommendations" in eval_data.detailed_report:
-                all_recommendations.extend(eval_data.detailed_report["recommendations"])
-        
-        if not all_strengths and not all_weaknesses and not all_recommendations:
-            print(" No detailed reports found, generating fallback summary...")
-            high_scores = [eval_data for eval_data in evaluation_data if eval_data.score >= 7]
-            low_scores = [eval_data for eval_data in evaluation_data if eval_data.score < 6]
-            
-            if high_scores:
-                all_strengths = ["Strong understanding of Excel concepts", "Good practical application skills", "Clear communication of technical concepts"]
-            if low_scores:
-                all_weaknesses = ["Need to provide more detailed explanations", "Could benefit from more specific examples", "Consider expanding knowledge of advanced features"]
-            
-            all_recommendations = [
-                "Practice explaining Excel concepts with specific examples",
-                "Focus on real-world application scenarios",
-                "Consider advanced Excel training for complex data analysis"
-            ]
+async def submit_turn(req: InterviewRequest, background_tasks: BackgroundTasks, interviewer: Interviewer,
+                      idempotency_key: str | None = None) -> tuple[dict, bool]:
+    # Turns on one session run one at a time, so a double submit waits for the first turn
+    # instead of running the evaluator and interviewer on the same state concurrently. With
+    # an Idempotency-Key the completed response is stored, and the waiting duplicate (or any
+    # later retry) gets it back without new LLM calls.
+    lock_key = req.session_id or (f"start:{idempotency_key}" if idempotency_key else None)
+    async with session_locks.hold(lock_key):
+        if not idempotency_key:
+            return await run_interview_turn(req, background_tasks, interviewer), False
         
-        if avg_score >= 8:
-            performance_level = "Excellent"
-            performance_desc = "Outstanding Excel proficiency with advanced understanding"
-        elif avg_score >= 6:
-            performance_level = "Good"
-            performance_desc = "Solid Excel skills with room for growth"
-        else:
-            performance_level = "Needs Improvement"
-            performance_desc = "Basic understanding with significant areas for development"
+        scope = req.session_id or ""
+        fingerprint = request_fingerprint(req.model_dump(exclude={"since", "pipelined"}))
+        stored = await idempotency_store.get(scope, idempotency_key)
+        if stored is not None:
+            if stored["fingerprint"] != fingerprint:
+                raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+            logger.info("idempotent replay", extra={"session_id": req.session_id})
+            return stored["response"], True
         
-        summary = f"""
-Interview Summary:
-- Total Questions: {len(state.user_answers)}
-- Average Score: {avg_score:.1f}/10
-- Overall Performance: {performance_level} - {performance_desc}
-- Score Range: {min(eval_data.score for eval_data in evaluation_data)}-{max(eval_data.score for eval_data in evaluation_data)}
+        response = await run_interview_turn(req, background_tasks, interviewer)
+        await idempotency_store.put(scope, idempotency_key, fingerprint, response)
+        return response, False
 
-Key Strengths:
-{chr(10).join(f"• {strength}" for strength in list(set(all_strengths))[:5]) if all_strengths else "• Unable to assess"}
+@app.post("/interview/")
+async def interview(req: InterviewRequest, background_tasks: BackgroundTasks, response: Response,
+                    idempotency_key: str | None = Header(default=None)):
+    content, replayed = await submit_turn(req, background_tasks, Interviewer(), idempotency_key)
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return content
 
-Areas for Improvement:
-{chr(10).join(f"• {weakness}" for weakness in list(set(all_weaknesses))[:5]) if all_weaknesses else "• Unable to assess"}
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
-Recommendations:
-{chr(10).join(f"• {rec}" for rec in list(set(all_recommendations))[:5]) if all_recommendations else "• Unable to assess"}
+@app.post("/interview/stream")
+async def interview_stream(req: InterviewRequest, background_tasks: BackgroundTasks,
+                           idempotency_key: str | None = Header(default=None)):
+    if req.session_id and await session_store.get(req.session_id) is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    async def event_stream():
+        # The Interviewer node pushes question deltas into the queue while the turn runs;
+        # None marks the end of the turn. A replayed turn sends no deltas, only "done".
+        tokens: asyncio.Queue = asyncio.Queue()
+        turn = asyncio.create_task(
+            submit_turn(req, background_tasks, Interviewer(token_sink=tokens.put_nowait), idempotency_key)
+        )
+        turn.add_done_callback(lambda _: tokens.put_nowait(None))
+        try:
+            while (delta := await tokens.get()) is not None:
+                yield sse_event("token", {"delta": delta})
+        finally:
+            # A client that disconnects mid-stream must not leave the turn half persisted.
+            if not turn.done():
+                await asyncio.wait([turn])
+        
+        try:
+            response, _ = turn.result()
+        except HTTPException as e:
+            yield sse_event("error", {"status_code": e.status_code, "detail": e.detail})
+            return
+        except Exception:
+            logger.exception("streaming turn failed")
+            yield sse_event("error", {"status_code": 500, "detail": "Interview turn failed"})
+            return
+        
+        session = await session_store.get(response["session_id"])
+        last_output = session["last_output"] if session else None
+        response["difficulty"] = last_output.difficulty if last_output else None
+        yield sse_event("done", response)
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
-Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-"""
-    else:
-        summary = f"""
-Interview Summary:
-- Total Questions: {len(state.user_answers)}
-- Session ID: {session_id}
-- Overall Performance: Unable to assess (evaluation data missing)
-- Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-"""
+@app.get("/report/{session_id}")
+async def get_report(session_id: str, format: Literal["pdf", "html", "markdown", "json"] = "pdf",
+                     if_none_match: str | None = Header(default=None)):
+    set_turn_context(session_id)
+    report = await load_report(session_store, session_id)
+    if report is None:
+        logger.warning("session not found", extra={"session_id": session_id})
+        raise HTTPException(status_code=404, detail="Session not found")
 
-    print(f" Created transcript with {len(transcript)} items")
-    print(" Generating PDF...")
+    if report.status == REPORT_PENDING:
+        return JSONResponse(status_code=202, content={"session_id": session_id, "status": REPORT_PENDING})
 
-    final_report = session.get("final_report")
+    final_report = report.final_report
     if not final_report:
-        print(" No final report available for PDF generation")
         raise HTTPException(status_code=400, detail="Final report not available")
     
-    print(f"Using final report for PDF generation")
+    # A finished session's report never changes, so every format is addressed by a hash of
+    # the report and the version of the code rendering it, and revalidated with If-None-Match.
+    key = report_format_key(session_id, final_report, format)
+    etag = f'"{key}-{format}"'
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={PDF_CACHE_MAX_AGE}"}
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
     
+    content = await report_renderer.render(session_id, final_report, format, key)
+    if format != "html":
+        headers["Content-Disposition"] = f"attachment; filename=excel_interview_report_{session_id[:8]}.{REPORT_EXTENSIONS[format]}"
+    return Response(content=content, media_type=REPORT_MEDIA_TYPES[format], headers=headers)
 
-    final_report_dict = {
-        "session_id": final_report.session_id,
-        "total_questions": final_report.total_questions,
-        "average_score": final_report.average_score,
-        "overall_performance": final_report.overall_performance,
-        "conversation_summary": final_report.conversation_summary,
-        "detailed_analysis": final_report.detailed_analysis,
-        "strengths": final_report.strengths,
-        "areas_for_improvement": final_report.areas_for_improvement,
-        "recommendations": final_report.recommendations,
-        "generated_at": final_report.generated_at
-    }
-    
-    pdf_buffer = generate_pdf_bytes(session_id, final_report_dict)
-    print(" PDF generated successfully")
-    
-    pdf_bytes = pdf_buffer.getvalue()
+class ReportExportRequest(BaseModel):
+    session_ids: list[str] | None = None
+    start_date: datetime | None = None
+    end_date: datetime | None = None
+    include_transcripts: bool = True
+
+@app.post("/reports/export")
+async def export_reports(req: ReportExportRequest):
+    if req.session_ids:
+        session_ids = list(dict.fromkeys(req.session_ids))
+        if len(session_ids) > EXPORT_MAX_SESSIONS:
+            raise HTTPException(status_code=400, detail=f"At most {EXPORT_MAX_SESSIONS} sessions can be exported at once")
+    elif req.start_date or req.end_date:
+        async with AsyncSessionLocal() as db:
+            session_ids = await AsyncDatabaseOperations(db).list_finished_session_ids(req.start_date, req.end_date, limit=EXPORT_MAX_SESSIONS + 1)
+        if len(session_ids) > EXPORT_MAX_SESSIONS:
+            raise HTTPException(status_code=400, detail=f"More than {EXPORT_MAX_SESSIONS} sessions in this date range; narrow it down")
+    else:
+        raise HTTPException(status_code=400, detail="Provide session_ids or a start_date/end_date range")
     
-    return Response(
-        content=pdf_bytes,
-        media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename=excel_interview_report_{session_id[:8]}.pdf"}
+    if req.include_transcripts:
+        await turn_writer.flush()
+    logger.info("exporting reports", extra={"count": len(session_ids)})
+    filename = f"interview_reports_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+    return StreamingResponse(
+        report_exporter.stream_zip(session_ids, req.include_transcripts),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
+@app.get("/report/{session_id}/status")
+async def get_report_status(session_id: str):
+    report = await load_report(session_store, session_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    return {
+        "session_id": session_id,
+        "status": report.status,
+        "error": report.error
+    }
+
+@app.post("/report/{session_id}/retry")
+async def retry_report(session_id: str, background_tasks: BackgroundTasks):
+    # Restarts a failed report job, including one reported as failed because its worker
+    # went away while it was pending.
+    async with session_locks.hold(session_id):
+        report = await load_report(session_store, session_id)
+        if report is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+        if report.status != REPORT_FAILED:
+            return {"session_id": session_id, "status": report.status}
+        
+        session = await session_store.get(session_id)
+        mark_report_pending(session)
+        await session_store.save(session_id, session)
+        background_tasks.add_task(run_report_job, session_store, turn_writer, pdf_cache, session_id)
+    logger.info("report job retried", extra={"session_id": session_id})
+    return JSONResponse(status_code=202, content={"session_id": session_id, "status": REPORT_PENDING})
+
+@app.get("/metrics")
+async def get_metrics():
+    content, media_type = metrics_payload()
+    return Response(content=content, media_type=media_type)
+
+@app.get("/usage/llm")
+async def get_llm_usage(start_date: datetime | None = None, end_date: datetime | None = None):
+    await turn_writer.flush()
+    async with AsyncSessionLocal() as db:
+        rows = await AsyncDatabaseOperations(db).usage_by_day(start_date, end_date)
+    total = {key: sum(row[key] or 0 for row in rows) for key in ("calls", "input_tokens", "cache_read_tokens", "output_tokens")}
+    total["cost_usd"] = round(sum(row["cost_usd"] for row in rows), 6)
+    return {"by_day_and_agent": rows, "total": total}
+
+@app.get("/usage/prompt-cache")
+async def get_prompt_cache_usage():
+    return prompt_cache_summary()
+
+@app.get("/usage/model-router")
+async def get_model_router_stats():
+    return model_router.summary()
+
+@app.get("/usage/pdf-cache")
+async def get_pdf_cache_stats():
+    return pdf_cache.summary()
+
+@app.get("/usage/evaluation-cache")
+async def get_evaluation_cache_stats():
+    return evaluation_cache.summary()
+
 @app.get("/transcript/{session_id}")
 async def get_transcript(session_id: str, db = Depends(get_db)):
-    db_ops = DatabaseOperations(db)
-    transcript = db_ops.get_session_transcript(session_id)
+    set_turn_context(session_id)
+    await turn_writer.flush()
+    db_ops = AsyncDatabaseOperations(db)
+    transcript = await db_ops.get_session_transcript(session_id)
     
     if not transcript:
         raise HTTPException(status_code=404, detail="Session not found")
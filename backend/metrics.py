@@ -0,0 +1,96 @@
+import os
+import time
+from functools import wraps
+from prometheus_client import Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+
+ACTIVE_SESSION_WINDOW_SECONDS = int(os.getenv("ACTIVE_SESSION_WINDOW_SECONDS", "1800"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40)
+
+LLM_CALL_SECONDS = Histogram(
+    "interview_llm_call_seconds", "LLM call latency by agent", ["agent"], buckets=LATENCY_BUCKETS
+)
+DB_OPERATION_SECONDS = Histogram(
+    "interview_db_operation_seconds", "Database operation latency", ["operation"], buckets=LATENCY_BUCKETS
+)
+PDF_RENDER_SECONDS = Histogram(
+    "interview_pdf_render_seconds", "PDF render time (cache misses only)", buckets=LATENCY_BUCKETS
+)
+REQUEST_SECONDS = Histogram(
+    "interview_http_request_seconds", "HTTP request latency until the last body chunk is sent",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS
+)
+TURNS_IN_PROGRESS = Gauge("interview_turns_in_progress", "Interview turns currently being processed")
+
+# Session id -> last time it took a turn. A session counts as active while it is unfinished
+# and has taken a turn within the window; sessions from before a restart reappear as soon as
+# they take their next turn.
+_session_last_seen: dict[str, float] = {}
+
+
+def touch_session(session_id: str):
+    _session_last_seen[session_id] = time.monotonic()
+
+
+def end_session(session_id: str):
+    _session_last_seen.pop(session_id, None)
+
+
+def active_sessions() -> int:
+    cutoff = time.monotonic() - ACTIVE_SESSION_WINDOW_SECONDS
+    for session_id in [key for key, seen in _session_last_seen.items() if seen < cutoff]:
+        del _session_last_seen[session_id]
+    return len(_session_last_seen)
+
+
+ACTIVE_SESSIONS = Gauge("interview_active_sessions", "Unfinished sessions with a turn in the activity window")
+ACTIVE_SESSIONS.set_function(active_sessions)
+
+
+def timed_db(operation: str):
+    def decorator(fn):
+        @wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with DB_OPERATION_SECONDS.labels(operation).time():
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class RequestMetricsMiddleware:
+    # Plain ASGI middleware: the route template (not the raw path) is the label, so session ids
+    # don't multiply series, and timing stops at the last body chunk so background tasks that
+    # run after the response aren't counted.
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = {"code": 500, "observed": False}
+
+        def observe():
+            if status["observed"]:
+                return
+            status["observed"] = True
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_SECONDS.labels(scope["method"], route, str(status["code"])).observe(time.perf_counter() - started)
+
+        async def send_and_observe(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                observe()
+
+        try:
+            await self.app(scope, receive, send_and_observe)
+        finally:
+            observe()
+
+
+def metrics_payload() -> tuple[bytes, str]:
+    return generate_latest(), CONTENT_TYPE_LATEST
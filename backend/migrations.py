@@ -0,0 +1,73 @@
+import logging
+import sys
+from datetime import datetime
+from sqlalchemy import inspect, text
+
+logger = logging.getLogger(__name__)
+
+
+def add_column(table: str, column: str, ddl_type: str):
+    def apply(conn):
+        existing = {c["name"] for c in inspect(conn).get_columns(table)}
+        if column not in existing:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+    return apply
+
+
+# Applied in order, each in its own transaction, and recorded in schema_migrations.
+# Every step is also safe to re-run, so databases created by create_all() (which already
+# have these columns and indexes) simply get the migrations marked as applied.
+MIGRATIONS = [
+    ("0001_session_transcript_json", [
+        add_column("interview_sessions", "transcript_json", "JSON"),
+    ]),
+    ("0002_session_lookup_indexes", [
+        "CREATE INDEX IF NOT EXISTS ix_questions_session_id_question_order ON questions (session_id, question_order)",
+        "CREATE INDEX IF NOT EXISTS ix_answers_session_id_question_id ON answers (session_id, question_id)",
+        "CREATE INDEX IF NOT EXISTS ix_answers_question_id ON answers (question_id)",
+        "CREATE INDEX IF NOT EXISTS ix_evaluations_session_id_question_id ON evaluations (session_id, question_id)",
+        "CREATE INDEX IF NOT EXISTS ix_evaluations_answer_id ON evaluations (answer_id)",
+    ]),
+    ("0003_session_final_report", [
+        add_column("interview_sessions", "final_report_json", "JSON"),
+    ]),
+    # The llm_usage table itself is new, so create_all() creates it.
+    ("0004_session_usage_totals", [
+        add_column("interview_sessions", "input_tokens", "INTEGER DEFAULT 0"),
+        add_column("interview_sessions", "cache_read_tokens", "INTEGER DEFAULT 0"),
+        add_column("interview_sessions", "output_tokens", "INTEGER DEFAULT 0"),
+        add_column("interview_sessions", "cost_usd", "FLOAT DEFAULT 0"),
+    ]),
+]
+
+
+def run_migrations(engine) -> list[str]:
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE IF NOT EXISTS schema_migrations (id TEXT PRIMARY KEY, applied_at TEXT NOT NULL)"))
+        applied = {row[0] for row in conn.execute(text("SELECT id FROM schema_migrations"))}
+
+    newly_applied = []
+    for migration_id, steps in MIGRATIONS:
+        if migration_id in applied:
+            continue
+        with engine.begin() as conn:
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(text(step))
+            conn.execute(
+                text("INSERT INTO schema_migrations (id, applied_at) VALUES (:id, :applied_at)"),
+                {"id": migration_id, "applied_at": datetime.now().isoformat()}
+            )
+        logger.info("applied migration", extra={"migration_id": migration_id})
+        newly_applied.append(migration_id)
+    return newly_applied
+
+
+if __name__ == "__main__":
+    # python migrations.py [path/to/interview_transcripts.db]
+    from database import create_db_engine, DATABASE_PATH
+    path = sys.argv[1] if len(sys.argv) > 1 else DATABASE_PATH
+    applied = run_migrations(create_db_engine(f"sqlite:///{path}"))
+    print(f"{len(applied)} migration(s) applied to {path}" if applied else f"{path} is up to date")
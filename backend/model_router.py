@@ -0,0 +1,174 @@
+import json
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional, TypeVar
+from models import State
+from question_bank import FIRST_EXCEL_TURN, target_difficulty
+
+logger = logging.getLogger(__name__)
+
+MODEL_ROUTER_ENABLED = os.getenv("MODEL_ROUTER_ENABLED", "true").lower() in ("1", "true", "yes")
+# Optional JSON file overriding DEFAULT_POLICY, e.g. {"excel:hard": ["openai:gpt-4o"], "default": ["openai:gpt-4o-mini"]}
+MODEL_ROUTER_POLICY = os.getenv("MODEL_ROUTER_POLICY", "")
+MODEL_ROUTER_LATENCY_BUDGET_MS = float(os.getenv("MODEL_ROUTER_LATENCY_BUDGET_MS", "6000"))
+MODEL_ROUTER_COOLDOWN_SECONDS = float(os.getenv("MODEL_ROUTER_COOLDOWN_SECONDS", "30"))
+# The interviewer prompt asks 4-5 Excel questions before it considers wrapping up.
+MODEL_ROUTER_WRAP_UP_AFTER = int(os.getenv("MODEL_ROUTER_WRAP_UP_AFTER", "4"))
+
+LARGE_MODEL = "openai:gpt-4o"
+SMALL_MODEL = "openai:gpt-4o-mini"
+
+# Each entry lists the preferred model first and its fallbacks after it. Keys are looked up as
+# "<phase>:<difficulty>", then "<phase>", then "default".
+DEFAULT_POLICY = {
+    "introduction": [SMALL_MODEL, LARGE_MODEL],
+    "background": [SMALL_MODEL, LARGE_MODEL],
+    "excel:easy": [SMALL_MODEL, LARGE_MODEL],
+    "excel:medium": [LARGE_MODEL, SMALL_MODEL],
+    "excel:hard": [LARGE_MODEL, SMALL_MODEL],
+    "wrap_up": [SMALL_MODEL, LARGE_MODEL],
+    "default": [LARGE_MODEL, SMALL_MODEL],
+}
+
+T = TypeVar("T")
+
+
+def load_policy(path: str = MODEL_ROUTER_POLICY) -> dict[str, list[str]]:
+    if not path:
+        return dict(DEFAULT_POLICY)
+    with open(path, "r", encoding="utf-8") as f:
+        policy = json.load(f)
+    if "default" not in policy:
+        policy["default"] = DEFAULT_POLICY["default"]
+    return policy
+
+
+def interview_phase(state: State) -> str:
+    turn = len(state.user_answers)
+    if turn == 0:
+        return "introduction"
+    if turn < FIRST_EXCEL_TURN:
+        return "background"
+    if turn - FIRST_EXCEL_TURN >= MODEL_ROUTER_WRAP_UP_AFTER:
+        return "wrap_up"
+    return "excel"
+
+
+@dataclass
+class RouteDecision:
+    phase: str
+    difficulty: str
+    candidates: list[Optional[str]]
+    reason: str
+    model: Optional[str] = None
+    latency_ms: float = 0.0
+    attempts: int = 0
+
+
+@dataclass
+class ModelLatency:
+    ewma_ms: Optional[float] = None
+    calls: int = 0
+    failures: int = 0
+    cooldown_until: float = 0.0
+    recent_ms: deque = field(default_factory=lambda: deque(maxlen=200))
+
+    def observe(self, latency_ms: float, alpha: float):
+        self.calls += 1
+        self.recent_ms.append(latency_ms)
+        self.ewma_ms = latency_ms if self.ewma_ms is None else alpha * latency_ms + (1 - alpha) * self.ewma_ms
+
+
+class ModelRouter:
+    def __init__(self, policy: dict[str, list[str]], enabled: bool = MODEL_ROUTER_ENABLED,
+                 latency_budget_ms: float = MODEL_ROUTER_LATENCY_BUDGET_MS,
+                 cooldown_seconds: float = MODEL_ROUTER_COOLDOWN_SECONDS, alpha: float = 0.3):
+        self.policy = policy
+        self.enabled = enabled
+        self.latency_budget_ms = latency_budget_ms
+        self.cooldown_seconds = cooldown_seconds
+        self.alpha = alpha
+        self.latency: dict[str, ModelLatency] = {}
+
+    def _stats(self, model: str) -> ModelLatency:
+        return self.latency.setdefault(model, ModelLatency())
+
+    def route(self, state: State) -> RouteDecision:
+        phase = interview_phase(state)
+        difficulty = target_difficulty(state.scores[FIRST_EXCEL_TURN:])
+        if not self.enabled:
+            return RouteDecision(phase, difficulty, [None], "router disabled")
+        models = self.policy.get(f"{phase}:{difficulty}") or self.policy.get(phase) or self.policy["default"]
+
+        # Models that just failed are skipped for a while, and so are models whose recent
+        # latency is over budget, as long as another candidate is within it.
+        now = time.monotonic()
+        cooling = [model for model in models if self._stats(model).cooldown_until > now]
+        available = [model for model in models if model not in cooling]
+        within_budget = [
+            model for model in available
+            if self._stats(model).ewma_ms is None or self._stats(model).ewma_ms <= self.latency_budget_ms
+        ]
+        over_budget = sorted((model for model in available if model not in within_budget), key=lambda model: self._stats(model).ewma_ms)
+        ordered = within_budget + over_budget + cooling
+        reason = "policy" if ordered[0] == models[0] else "latency/cooldown"
+        return RouteDecision(phase, difficulty, ordered, reason)
+
+    async def run(self, decision: RouteDecision, attempt: Callable[[Optional[str]], Awaitable[T]],
+                  can_retry: Callable[[], bool] = lambda: True) -> T:
+        # Tries the candidates in order; a failed model falls back to the next one unless part
+        # of the answer has already reached the client.
+        for index, model in enumerate(decision.candidates):
+            decision.attempts += 1
+            started = time.perf_counter()
+            try:
+                result = await attempt(model)
+            except Exception as e:
+                if model is None or index == len(decision.candidates) - 1 or not can_retry():
+                    raise
+                stats = self._stats(model)
+                stats.failures += 1
+                stats.cooldown_until = time.monotonic() + self.cooldown_seconds
+                logger.warning("model failed, falling back", extra={
+                    "model": model, "fallback": decision.candidates[index + 1], "error": f"{type(e).__name__}: {e}"
+                })
+                continue
+            decision.model = model
+            decision.latency_ms = (time.perf_counter() - started) * 1000
+            if model is not None:
+                self._stats(model).observe(decision.latency_ms, self.alpha)
+            logger.debug("model routed", extra={
+                "phase": decision.phase,
+                "difficulty": decision.difficulty,
+                "model": model or "default",
+                "reason": decision.reason,
+                "attempts": decision.attempts,
+                "latency_ms": round(decision.latency_ms, 1)
+            })
+            return result
+        raise RuntimeError("Model router has no candidate models")
+
+    def summary(self) -> dict:
+        models = {}
+        for model, stats in self.latency.items():
+            recent = sorted(stats.recent_ms)
+            models[model] = {
+                "calls": stats.calls,
+                "failures": stats.failures,
+                "ewma_ms": round(stats.ewma_ms, 1) if stats.ewma_ms is not None else None,
+                "p50_ms": round(recent[len(recent) // 2], 1) if recent else None,
+                "p95_ms": round(recent[min(len(recent) - 1, int(len(recent) * 0.95))], 1) if recent else None,
+                "cooling_down": stats.cooldown_until > time.monotonic(),
+            }
+        return {
+            "enabled": self.enabled,
+            "latency_budget_ms": self.latency_budget_ms,
+            "policy": self.policy,
+            "models": models,
+        }
+
+
+model_router = ModelRouter(load_policy())
@@ -18,6 +18,17 @@ class State:
     history: list[ModelMessage] = field(default_factory=list)
     user_answers: list[Answer] = field(default_factory=list)
     feedback_history: list[Feedback] = field(default_factory=list)
+    history_summary: str = ""
+    token_usage: list[dict] = field(default_factory=list)
+    scores: list[int] = field(default_factory=list)
+    seen_bank_questions: list[int] = field(default_factory=list)
+    seen_bank_topics: list[str] = field(default_factory=list)
+    last_bank_turn: int = -1
+    tokens_used: int = 0
+    cost_usd: float = 0.0
+    # 0 means no limit.
+    token_budget: int = 0
+    cost_budget_usd: float = 0.0
 
 
 class Feedback(BaseModel):
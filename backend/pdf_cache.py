@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Optional
+import pdf_gen
+import report_model
+from metrics import PDF_RENDER_SECONDS
+from tracing import span
+from models import FinalReport
+from report_model import ReportModel, build_report_model
+
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", "./pdf_cache")
+PDF_CACHE_MEMORY_MB = float(os.getenv("PDF_CACHE_MEMORY_MB", "64"))
+PDF_CACHE_DISK_MB = float(os.getenv("PDF_CACHE_DISK_MB", "1024"))
+PDF_CACHE_MAX_AGE = int(os.getenv("PDF_CACHE_MAX_AGE", "3600"))
+
+
+def template_version(*paths: str) -> str:
+    # Any change to pdf_gen.py (layout, fonts, sanitizer) or to the report model it renders
+    # yields new keys, so PDFs rendered with an older template are never served.
+    digest = hashlib.sha256()
+    for path in paths or (pdf_gen.__file__, report_model.__file__):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+PDF_TEMPLATE_VERSION = template_version()
+
+
+def report_cache_key(session_id: str, final_report: FinalReport) -> str:
+    raw = "\x00".join([PDF_TEMPLATE_VERSION, session_id, final_report.model_dump_json()])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class PdfCacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    renders: int = 0
+
+
+class PdfCache:
+    def __init__(
+        self,
+        directory: str = PDF_CACHE_DIR,
+        memory_bytes: int = int(PDF_CACHE_MEMORY_MB * 1024 * 1024),
+        disk_bytes: int = int(PDF_CACHE_DISK_MB * 1024 * 1024),
+    ):
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.stats = PdfCacheStats()
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_used = 0
+        self._rendering: dict[str, asyncio.Task] = {}
+        os.makedirs(directory, exist_ok=True)
+        self._disk_used = self._trim()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def _remember(self, key: str, pdf_bytes: bytes):
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = pdf_bytes
+        self._memory_used += len(pdf_bytes)
+        while self._memory_used > self.memory_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= len(evicted)
+
+    def _read(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                pdf_bytes = f.read()
+            # Disk hits count as a use, so trimming removes the least recently used files.
+            os.utime(path)
+            return pdf_bytes
+        except FileNotFoundError:
+            return None
+
+    def _write(self, key: str, pdf_bytes: bytes):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(pdf_bytes)
+        os.replace(tmp_path, path)
+
+    def _trim(self) -> int:
+        # Removes the oldest PDFs until the directory fits in disk_bytes and returns the bytes
+        # still in use. Other workers may share the directory, so it is rescanned every time.
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".pdf"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        used = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if used <= self.disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            used -= size
+        return used
+
+    async def get(self, key: str) -> Optional[bytes]:
+        pdf_bytes = self._memory.get(key)
+        if pdf_bytes is not None:
+            self._memory.move_to_end(key)
+            self.stats.memory_hits += 1
+            return pdf_bytes
+        pdf_bytes = await asyncio.to_thread(self._read, key)
+        if pdf_bytes is not None:
+            self._remember(key, pdf_bytes)
+            self.stats.disk_hits += 1
+        return pdf_bytes
+
+    async def _render(self, key: str, model: ReportModel) -> bytes:
+        with span("pdf render", report_key=key[:12]), PDF_RENDER_SECONDS.time():
+            buffer = await asyncio.to_thread(pdf_gen.generate_pdf_bytes, model)
+        pdf_bytes = buffer.getvalue()
+        self.stats.renders += 1
+        await asyncio.to_thread(self._write, key, pdf_bytes)
+        self._disk_used += len(pdf_bytes)
+        if self._disk_used > self.disk_bytes:
+            self._disk_used = await asyncio.to_thread(self._trim)
+        self._remember(key, pdf_bytes)
+        return pdf_bytes
+
+    async def render(self, session_id: str, final_report: FinalReport, model: Optional[ReportModel] = None) -> tuple[str, bytes]:
+        # Returns (key, pdf) and renders at most once per key, even when several requests for
+        # the same report arrive together. Callers that already built the report model pass it.
+        key = report_cache_key(session_id, final_report)
+        pdf_bytes = await self.get(key)
+        if pdf_bytes is not None:
+            return key, pdf_bytes
+        task = self._rendering.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._render(key, model or build_report_model(session_id, final_report)))
+            self._rendering[key] = task
+            task.add_done_callback(lambda _: self._rendering.pop(key, None))
+        return key, await asyncio.shield(task)
+
+    def summary(self) -> dict:
+        return {
+            **asdict(self.stats),
+            "template_version": PDF_TEMPLATE_VERSION,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_used,
+            "disk_bytes": self._disk_used,
+        }
+
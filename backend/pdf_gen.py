@@ -1,263 +1,261 @@
 from fpdf import FPDF
 import io
-from typing import Dict, Any
+from dataclasses import asdict
+from functools import lru_cache
+from typing import Any
 import re
+from report_model import ReportModel
+
+EMOJI_REPLACEMENTS = {
+    '🤖': '[AI]',
+    '📊': '[Chart]',
+    '📄': '[Document]',
+    '📥': '[Download]',
+    '✅': '[Check]',
+    '⚠️': '[Warning]',
+    '💡': '[Idea]',
+    '📋': '[List]',
+    '🔄': '[Refresh]',
+    '🚀': '[Start]',
+    '💬': '[Chat]',
+    '📤': '[Send]',
+    '🎉': '[Celebration]',
+    '🧑': '[Person]',
+    '📝': '[Note]',
+    '📈': '[Trend]',
+    '🎯': '[Target]',
+    '🔧': '[Tool]',
+    '⭐': '[Star]',
+    '🔥': '[Fire]',
+    '💯': '[Perfect]',
+    '🎊': '[Party]',
+    '🏆': '[Trophy]',
+    '🎁': '[Gift]',
+    '🌟': '[Star]',
+    '💎': '[Diamond]',
+    '🚨': '[Alert]',
+    '🎪': '[Circus]',
+    '🎨': '[Art]',
+    '🎵': '[Music]',
+    '🎬': '[Movie]',
+    '🎮': '[Game]',
+    '🎲': '[Dice]',
+    '🎳': '[Bowling]',
+    '🎸': '[Guitar]',
+    '🎺': '[Trumpet]',
+    '🎻': '[Violin]',
+    '🎹': '[Piano]',
+    '🎤': '[Microphone]',
+    '🎧': '[Headphones]',
+    '🎭': '[Theater]',
+    '🎫': '[Ticket]',
+    '🎟️': '[Ticket]',
+    '🎠': '[Carousel]',
+    '🎡': '[Ferris Wheel]',
+    '🎢': '[Roller Coaster]',
+    '🎣': '[Fishing]',
+    '🎥': '[Camera]',
+    '🎦': '[Cinema]',
+    '🎩': '[Top Hat]',
+    '🎰': '[Slot Machine]',
+    '🎱': '[8 Ball]',
+    '🎴': '[Playing Cards]',
+    '🎶': '[Musical Notes]',
+    '🎷': '[Saxophone]',
+    '🎼': '[Musical Score]',
+    '🎽': '[Running Shirt]',
+    '🎾': '[Tennis]',
+    '🎿': '[Skiing]',
+    '🏀': '[Basketball]',
+    '🏁': '[Checkered Flag]',
+    '🏂': '[Snowboarding]',
+    '🏃': '[Running]',
+    '🏄': '[Surfing]',
+    '🏅': '[Medal]',
+    '🏇': '[Horse Racing]',
+    '🏈': '[American Football]',
+    '🏉': '[Rugby]',
+    '🏊': '[Swimming]',
+    '🏋️': '[Weight Lifting]',
+    '🏌️': '[Golf]',
+    '🏍️': '[Motorcycle]',
+    '🏎️': '[Race Car]',
+    '🏏': '[Cricket]',
+    '🏐': '[Volleyball]',
+    '🏑': '[Field Hockey]',
+    '🏒': '[Ice Hockey]',
+    '🏓': '[Ping Pong]',
+    '🏔️': '[Mountain]',
+    '🏕️': '[Camping]',
+    '🏖️': '[Beach]',
+    '🏗️': '[Construction]',
+    '🏘️': '[Houses]',
+    '🏙️': '[Cityscape]',
+    '🏚️': '[Derelict House]',
+    '🏛️': '[Classical Building]',
+    '🏜️': '[Desert]',
+    '🏝️': '[Desert Island]',
+    '🏞️': '[National Park]',
+    '🏟️': '[Stadium]',
+    '🏠': '[House]',
+    '🏡': '[House with Garden]',
+    '🏢': '[Office Building]',
+    '🏣': '[Post Office]',
+    '🏤': '[European Post Office]',
+    '🏥': '[Hospital]',
+    '🏦': '[Bank]',
+    '🏧': '[ATM]',
+    '🏨': '[Hotel]',
+    '🏩': '[Love Hotel]',
+    '🏪': '[Convenience Store]',
+    '🏫': '[School]',
+    '🏬': '[Department Store]',
+    '🏭': '[Factory]',
+    '🏮': '[Red Paper Lantern]',
+    '🏯': '[Japanese Castle]',
+    '🏰': '[Castle]',
+    '🏱': '[Japanese Post Office]',
+    '🏲': '[Japanese Post Office]',
+    '🏳️': '[White Flag]',
+    '🏴': '[Black Flag]',
+    '🏵️': '[Rosette]',
+    '🏶': '[Japanese Post Office]',
+    '🏷️': '[Label]',
+    '🏸': '[Badminton]',
+    '🏹': '[Bow and Arrow]',
+    '🏺': '[Amphora]',
+    '🏻': '[Light Skin Tone]',
+    '🏼': '[Medium-Light Skin Tone]',
+    '🏽': '[Medium Skin Tone]',
+    '🏾': '[Medium-Dark Skin Tone]',
+    '🏿': '[Dark Skin Tone]',
+}
+
+# Emoji only ever appear inside runs of non-ASCII characters, so the text is scanned once for
+# such runs and each run is resolved left to right, longest emoji first; whatever is left
+# between emoji collapses to "[?]". This gives the same result as replacing every emoji in turn
+# and then collapsing the remaining non-ASCII runs.
+_NON_ASCII_RUN = re.compile(r"[^\x00-\x7F]+")
+_EMOJI_LENGTHS = sorted({len(key) for key in EMOJI_REPLACEMENTS}, reverse=True)
+
+
+@lru_cache(maxsize=4096)
+def _resolve_run(run: str) -> str:
+    parts = []
+    unknown = False
+    i = 0
+    while i < len(run):
+        for length in _EMOJI_LENGTHS:
+            replacement = EMOJI_REPLACEMENTS.get(run[i:i + length])
+            if replacement is not None:
+                parts.append(replacement)
+                unknown = False
+                i += length
+                break
+        else:
+            if not unknown:
+                parts.append("[?]")
+                unknown = True
+            i += 1
+    return "".join(parts)
+
+
+def _replace_run(match: re.Match) -> str:
+    # The same few runs ("🎉", "—", "“") repeat throughout a report, so resolutions are cached.
+    return _resolve_run(match.group(0))
+
 
 def clean_text_for_pdf(text: str) -> str:
     if not text:
         return ""
-    
-    replacements = {
-        '🤖': '[AI]',
-        '📊': '[Chart]',
-        '📄': '[Document]',
-        '📥': '[Download]',
-        '✅': '[Check]',
-        '⚠️': '[Warning]',
-        '💡': '[Idea]',
-        '📋': '[List]',
-        '🔄': '[Refresh]',
-        '🚀': '[Start]',
-        '💬': '[Chat]',
-        '📤': '[Send]',
-        '🎉': '[Celebration]',
-        '🧑': '[Person]',
-        '📝': '[Note]',
-        '📈': '[Trend]',
-        '🎯': '[Target]',
-        '🔧': '[Tool]',
-        '⭐': '[Star]',
-        '🔥': '[Fire]',
-        '💯': '[Perfect]',
-        '🎊': '[Party]',
-        '🏆': '[Trophy]',
-        '🎁': '[Gift]',
-        '🌟': '[Star]',
-        '💎': '[Diamond]',
-        '🚨': '[Alert]',
-        '🎪': '[Circus]',
-        '🎨': '[Art]',
-        '🎵': '[Music]',
-        '🎬': '[Movie]',
-        '🎮': '[Game]',
-        '🎯': '[Target]',
-        '🎲': '[Dice]',
-        '🎳': '[Bowling]',
-        '🎸': '[Guitar]',
-        '🎺': '[Trumpet]',
-        '🎻': '[Violin]',
-        '🎹': '[Piano]',
-        '🎤': '[Microphone]',
-        '🎧': '[Headphones]',
-        '🎨': '[Art]',
-        '🎭': '[Theater]',
-        '🎪': '[Circus]',
-        '🎫': '[Ticket]',
-        '🎟️': '[Ticket]',
-        '🎠': '[Carousel]',
-        '🎡': '[Ferris Wheel]',
-        '🎢': '[Roller Coaster]',
-        '🎣': '[Fishing]',
-        '🎤': '[Microphone]',
-        '🎥': '[Camera]',
-        '🎦': '[Cinema]',
-        '🎧': '[Headphones]',
-        '🎨': '[Art]',
-        '🎩': '[Top Hat]',
-        '🎪': '[Circus]',
-        '🎫': '[Ticket]',
-        '🎬': '[Movie]',
-        '🎭': '[Theater]',
-        '🎮': '[Game]',
-        '🎯': '[Target]',
-        '🎰': '[Slot Machine]',
-        '🎱': '[8 Ball]',
-        '🎲': '[Dice]',
-        '🎳': '[Bowling]',
-        '🎴': '[Playing Cards]',
-        '🎵': '[Music]',
-        '🎶': '[Musical Notes]',
-        '🎷': '[Saxophone]',
-        '🎸': '[Guitar]',
-        '🎹': '[Piano]',
-        '🎺': '[Trumpet]',
-        '🎻': '[Violin]',
-        '🎼': '[Musical Score]',
-        '🎽': '[Running Shirt]',
-        '🎾': '[Tennis]',
-        '🎿': '[Skiing]',
-        '🏀': '[Basketball]',
-        '🏁': '[Checkered Flag]',
-        '🏂': '[Snowboarding]',
-        '🏃': '[Running]',
-        '🏄': '[Surfing]',
-        '🏅': '[Medal]',
-        '🏆': '[Trophy]',
-        '🏇': '[Horse Racing]',
-        '🏈': '[American Football]',
-        '🏉': '[Rugby]',
-        '🏊': '[Swimming]',
-        '🏋️': '[Weight Lifting]',
-        '🏌️': '[Golf]',
-        '🏍️': '[Motorcycle]',
-        '🏎️': '[Race Car]',
-        '🏏': '[Cricket]',
-        '🏐': '[Volleyball]',
-        '🏑': '[Field Hockey]',
-        '🏒': '[Ice Hockey]',
-        '🏓': '[Ping Pong]',
-        '🏔️': '[Mountain]',
-        '🏕️': '[Camping]',
-        '🏖️': '[Beach]',
-        '🏗️': '[Construction]',
-        '🏘️': '[Houses]',
-        '🏙️': '[Cityscape]',
-        '🏚️': '[Derelict House]',
-        '🏛️': '[Classical Building]',
-        '🏜️': '[Desert]',
-        '🏝️': '[Desert Island]',
-        '🏞️': '[National Park]',
-        '🏟️': '[Stadium]',
-        '🏠': '[House]',
-        '🏡': '[House with Garden]',
-        '🏢': '[Office Building]',
-        '🏣': '[Post Office]',
-        '🏤': '[European Post Office]',
-        '🏥': '[Hospital]',
-        '🏦': '[Bank]',
-        '🏧': '[ATM]',
-        '🏨': '[Hotel]',
-        '🏩': '[Love Hotel]',
-        '🏪': '[Convenience Store]',
-        '🏫': '[School]',
-        '🏬': '[Department Store]',
-        '🏭': '[Factory]',
-        '🏮': '[Red Paper Lantern]',
-        '🏯': '[Japanese Castle]',
-        '🏰': '[Castle]',
-        '🏱': '[Japanese Post Office]',
-        '🏲': '[Japanese Post Office]',
-        '🏳️': '[White Flag]',
-        '🏴': '[Black Flag]',
-        '🏵️': '[Rosette]',
-        '🏶': '[Japanese Post Office]',
-        '🏷️': '[Label]',
-        '🏸': '[Badminton]',
-        '🏹': '[Bow and Arrow]',
-        '🏺': '[Amphora]',
-        '🏻': '[Light Skin Tone]',
-        '🏼': '[Medium-Light Skin Tone]',
-        '🏽': '[Medium Skin Tone]',
-        '🏾': '[Medium-Dark Skin Tone]',
-        '🏿': '[Dark Skin Tone]',
-    }
-    
-    for unicode_char, replacement in replacements.items():
-        text = text.replace(unicode_char, replacement)
-    text = re.sub(r'[^\x00-\x7F]+', '[?]', text)
-    
-    return text
+    if text.isascii():
+        return text
+    return _NON_ASCII_RUN.sub(_replace_run, text)
+
+
+@lru_cache(maxsize=256)
+def clean_label(text: str) -> str:
+    # For the fixed headings and labels that are sanitized on every render.
+    return clean_text_for_pdf(text)
+
 
-def generate_pdf_bytes(session_id: str, final_report: Dict[str, Any]) -> io.BytesIO:
+def sanitize_report(value: Any) -> Any:
+    # Sanitizes every string in a report dict (recursively) in one go, so rendering code can
+    # use the values as they are.
+    if isinstance(value, str):
+        return clean_text_for_pdf(value)
+    if isinstance(value, dict):
+        return {key: sanitize_report(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [sanitize_report(item) for item in value]
+    if isinstance(value, tuple):
+        return tuple(sanitize_report(item) for item in value)
+    return value
+
+def generate_pdf_bytes(model: ReportModel) -> io.BytesIO:
+    report = ReportModel(**sanitize_report(asdict(model)))
     pdf = FPDF()
     pdf.add_page()
 
     pdf.set_font("Arial", "B", 16)
-    pdf.cell(0, 10, clean_text_for_pdf(f"Excel Interview Assessment Report"), ln=True, align="C")
+    pdf.cell(0, 10, clean_label("Excel Interview Assessment Report"), ln=True, align="C")
     pdf.set_font("Arial", "", 12)
-    pdf.cell(0, 8, clean_text_for_pdf(f"Session ID: {session_id}"), ln=True, align="C")
+    pdf.cell(0, 8, f"Session ID: {report.session_id}", ln=True, align="C")
     pdf.ln(15)
 
     pdf.set_font("Arial", "B", 14)
-    pdf.cell(0, 10, clean_text_for_pdf("Executive Summary"), ln=True)
+    pdf.cell(0, 10, clean_label("Executive Summary"), ln=True)
     pdf.set_font("Arial", "", 12)
-    
-    if final_report.get("conversation_summary"):
-        pdf.multi_cell(0, 8, clean_text_for_pdf(final_report["conversation_summary"]))
-    else:
-        pdf.multi_cell(0, 8, clean_text_for_pdf("This report provides a comprehensive assessment of the candidate's Excel proficiency based on their interview performance."))
-    
+    pdf.multi_cell(0, 8, report.summary)
     pdf.ln(10)
 
     pdf.set_font("Arial", "B", 14)
-    pdf.cell(0, 10, clean_text_for_pdf("Candidate Assessment"), ln=True)
+    pdf.cell(0, 10, clean_label("Candidate Assessment"), ln=True)
     pdf.set_font("Arial", "", 12)
     
     pdf.set_font("Arial", "B", 12)
-    pdf.cell(0, 8, clean_text_for_pdf("Performance Overview:"), ln=True)
+    pdf.cell(0, 8, clean_label("Performance Overview:"), ln=True)
     pdf.set_font("Arial", "", 12)
     
-    if final_report.get("detailed_analysis"):
-        analysis = final_report["detailed_analysis"]
-        
-        if analysis.get("interview_flow"):
-            pdf.multi_cell(0, 8, clean_text_for_pdf(f"Interview Flow: {analysis['interview_flow']}"))
-            pdf.ln(3)
-        
-        if analysis.get("performance_consistency"):
-            pdf.multi_cell(0, 8, clean_text_for_pdf(f"Performance Consistency: {analysis['performance_consistency']}"))
-            pdf.ln(3)
-        
-        if analysis.get("knowledge_depth"):
-            pdf.multi_cell(0, 8, clean_text_for_pdf(f"Knowledge Depth: {analysis['knowledge_depth']}"))
-            pdf.ln(3)
-        
-        if analysis.get("practical_application"):
-            pdf.multi_cell(0, 8, clean_text_for_pdf(f"Practical Application: {analysis['practical_application']}"))
-            pdf.ln(3)
-        
-        if analysis.get("communication_effectiveness"):
-            pdf.multi_cell(0, 8, clean_text_for_pdf(f"Communication Skills: {analysis['communication_effectiveness']}"))
-            pdf.ln(3)
-        
-        if analysis.get("role_relevance"):
-            pdf.multi_cell(0, 8, clean_text_for_pdf(f"Role Relevance: {analysis['role_relevance']}"))
-            pdf.ln(3)
+    for label, text in report.analysis:
+        pdf.multi_cell(0, 8, f"{clean_label(f'{label}: ')}{text}")
+        pdf.ln(3)
 
     pdf.ln(5)
 
     pdf.set_font("Arial", "B", 14)
-    pdf.cell(0, 10, clean_text_for_pdf("Strengths & Development Areas"), ln=True)
+    pdf.cell(0, 10, clean_label("Strengths & Development Areas"), ln=True)
     pdf.set_font("Arial", "", 12)
     
-    if final_report.get("strengths"):
-        pdf.set_font("Arial", "B", 12)
-        pdf.cell(0, 8, clean_text_for_pdf("Key Strengths:"), ln=True)
-        pdf.set_font("Arial", "", 12)
-        for strength in final_report["strengths"]:
-            pdf.multi_cell(0, 8, clean_text_for_pdf(f"• {strength}"))
-        pdf.ln(3)
-    
-    if final_report.get("areas_for_improvement"):
-        pdf.set_font("Arial", "B", 12)
-        pdf.cell(0, 8, clean_text_for_pdf("Areas for Development:"), ln=True)
-        pdf.set_font("Arial", "", 12)
-        for area in final_report["areas_for_improvement"]:
-            pdf.multi_cell(0, 8, clean_text_for_pdf(f"• {area}"))
-        pdf.ln(3)
-
-    if final_report.get("recommendations"):
+    sections = (
+        ("Key Strengths:", report.strengths, 3),
+        ("Areas for Development:", report.areas_for_improvement, 3),
+        ("Recommendations:", report.recommendations, 5),
+    )
+    for title, items, spacing in sections:
+        if not items:
+            continue
         pdf.set_font("Arial", "B", 12)
-        pdf.cell(0, 8, clean_text_for_pdf("Recommendations:"), ln=True)
+        pdf.cell(0, 8, clean_label(title), ln=True)
         pdf.set_font("Arial", "", 12)
-        for rec in final_report["recommendations"]:
-            pdf.multi_cell(0, 8, clean_text_for_pdf(f"• {rec}"))
-        pdf.ln(5)
+        for item in items:
+            pdf.multi_cell(0, 8, f"{clean_label('• ')}{item}")
+        pdf.ln(spacing)
 
     pdf.set_font("Arial", "B", 14)
-    pdf.cell(0, 10, clean_text_for_pdf("Final Assessment"), ln=True)
+    pdf.cell(0, 10, clean_label("Final Assessment"), ln=True)
     pdf.set_font("Arial", "", 12)
     
-    assessment_summary = f"Overall Performance: {final_report.get('overall_performance', 'Assessment completed')}\n"
-    assessment_summary += f"Average Score: {final_report.get('average_score', 0):.1f}/10\n"
-    assessment_summary += f"Total Questions: {final_report.get('total_questions', 0)}\n"
-    assessment_summary += f"Generated: {final_report.get('generated_at', 'N/A')}"
+    assessment_summary = f"Overall Performance: {report.overall_performance}\n"
+    assessment_summary += f"Average Score: {report.average_score:.1f}/10\n"
+    assessment_summary += f"Total Questions: {report.total_questions}\n"
+    assessment_summary += f"Generated: {report.generated_at}"
     
-    pdf.multi_cell(0, 8, clean_text_for_pdf(assessment_summary))
+    pdf.multi_cell(0, 8, assessment_summary)
 
     pdf.ln(10)
     pdf.set_font("Arial", "I", 10)
-    pdf.cell(0, 8, clean_text_for_pdf("This report was generated by AI Interview Assessment System"), ln=True, align="C")
+    pdf.cell(0, 8, clean_label("This report was generated by AI Interview Assessment System"), ln=True, align="C")
 
     output = pdf.output(dest="S")
     buf = io.BytesIO(output.encode('latin-1'))
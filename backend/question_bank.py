@@ -0,0 +1,234 @@
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+import random
+from dataclasses import dataclass
+from typing import Optional
+from pydantic import BaseModel
+from pydantic_ai import Agent
+from database import SessionLocal, BankQuestion, init_database
+from evaluation_cache import normalize_text
+from logging_config import configure_logging
+from models import State
+from prompt import question_bank_prompt, prompt_version
+from usage_stats import record_usage, response_model_name
+from dotenv import load_dotenv
+load_dotenv()
+
+# "off" keeps every question LLM generated; "bank" serves core Excel questions from the bank
+# and leaves the LLM to write the personalized follow-ups in between.
+QUESTION_BANK_MODE = os.getenv("QUESTION_BANK_MODE", "off")
+QUESTION_BANK_MAX_PER_SESSION = int(os.getenv("QUESTION_BANK_MAX_PER_SESSION", "3"))
+
+logger = logging.getLogger(__name__)
+
+DIFFICULTIES = ("easy", "medium", "hard")
+EXCEL_TOPICS = [
+    "lookup functions",
+    "logical functions",
+    "text functions",
+    "date and time functions",
+    "statistical functions",
+    "pivot tables",
+    "charts and dashboards",
+    "conditional formatting",
+    "data validation",
+    "data cleaning",
+    "dynamic arrays",
+    "Power Query",
+    "what-if analysis",
+    "macros and VBA",
+]
+# Answers 0 and 1 are the introduction and the candidate's background (phases 1 and 2).
+FIRST_EXCEL_TURN = 2
+
+
+class GeneratedQuestions(BaseModel):
+    questions: list[str]
+
+
+question_bank_agent = Agent(
+    "openai:gpt-4o",
+    output_type=GeneratedQuestions,
+    system_prompt=question_bank_prompt,
+)
+
+
+def question_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def target_difficulty(scores: list[int]) -> str:
+    # Same ladder as the interviewer prompt: < 4 easy, 4-7 medium, >= 7 hard.
+    if not scores:
+        return "medium"
+    average = sum(scores) / len(scores)
+    if average < 4:
+        return "easy"
+    if average < 7:
+        return "medium"
+    return "hard"
+
+
+@dataclass
+class BankEntry:
+    id: int
+    topic: str
+    difficulty: str
+    text: str
+
+
+class QuestionBank:
+    def __init__(self, mode: str = QUESTION_BANK_MODE, max_per_session: int = QUESTION_BANK_MAX_PER_SESSION):
+        self.mode = mode
+        self.max_per_session = max_per_session
+        self._by_difficulty: dict[str, list[BankEntry]] = {difficulty: [] for difficulty in DIFFICULTIES}
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode == "bank"
+
+    def load(self, session_factory=SessionLocal) -> int:
+        db = session_factory()
+        try:
+            rows = db.query(BankQuestion).filter(BankQuestion.is_active == True).all()
+        finally:
+            db.close()
+        self._by_difficulty = {difficulty: [] for difficulty in DIFFICULTIES}
+        for row in rows:
+            if row.difficulty in self._by_difficulty:
+                self._by_difficulty[row.difficulty].append(BankEntry(row.id, row.topic, row.difficulty, row.question_text))
+        logger.info("question bank loaded", extra={difficulty: len(entries) for difficulty, entries in self._by_difficulty.items()})
+        return len(rows)
+
+    def pick(self, state: State) -> Optional[BankEntry]:
+        # A bank question is served on Excel turns, at most max_per_session times, and never
+        # twice in a row, so every bank question is followed by an LLM-written follow-up.
+        turn = len(state.user_answers)
+        if not self.enabled or turn < FIRST_EXCEL_TURN:
+            return None
+        if len(state.seen_bank_questions) >= self.max_per_session or state.last_bank_turn == turn - 1:
+            return None
+
+        difficulty = target_difficulty(state.scores[FIRST_EXCEL_TURN:])
+        seen = set(state.seen_bank_questions)
+        candidates = [entry for entry in self._by_difficulty[difficulty] if entry.id not in seen]
+        if not candidates:
+            return None
+        seen_topics = set(state.seen_bank_topics)
+        fresh = [entry for entry in candidates if entry.topic not in seen_topics]
+        entry = random.choice(fresh or candidates)
+
+        state.seen_bank_questions.append(entry.id)
+        state.seen_bank_topics.append(entry.topic)
+        state.last_bank_turn = turn
+        return entry
+
+
+question_bank = QuestionBank()
+
+
+async def generate_questions(topic: str, difficulty: str, count: int, existing: list[str]) -> list[str]:
+    lines = [f"Topic: {topic}", f"Difficulty: {difficulty}", f"Write {count} new questions."]
+    if existing:
+        lines.append("Existing questions:")
+        lines.extend(f"- {text}" for text in existing)
+    result = await question_bank_agent.run("\n".join(lines))
+    record_usage("question_bank", result.usage(), response_model_name(result.new_messages()))
+    return result.output.questions[:count]
+
+
+async def fill_cell(topic: str, difficulty: str, per_cell: int, semaphore: asyncio.Semaphore) -> int:
+    version = prompt_version(question_bank_prompt)
+    db = SessionLocal()
+    try:
+        existing = db.query(BankQuestion).filter(
+            BankQuestion.topic == topic, BankQuestion.difficulty == difficulty, BankQuestion.is_active == True
+        ).all()
+        missing = per_cell - len(existing)
+        if missing <= 0:
+            return 0
+        async with semaphore:
+            generated = await generate_questions(topic, difficulty, missing, [row.question_text for row in existing])
+
+        known = {row.text_hash for row in db.query(BankQuestion.text_hash)}
+        added = 0
+        for text in generated:
+            text_hash = question_hash(text)
+            if not text.strip() or text_hash in known:
+                continue
+            known.add(text_hash)
+            db.add(BankQuestion(topic=topic, difficulty=difficulty, question_text=text.strip(), text_hash=text_hash, prompt_version=version))
+            added += 1
+        db.commit()
+        print(f"{topic} / {difficulty}: added {added} question(s)")
+        return added
+    finally:
+        db.close()
+
+
+def retire_stale_questions() -> int:
+    # Questions written with an older question_bank_prompt are deactivated, so the next fill
+    # regenerates them; they stay in the table because past transcripts may reference them.
+    version = prompt_version(question_bank_prompt)
+    db = SessionLocal()
+    try:
+        retired = db.query(BankQuestion).filter(
+            BankQuestion.is_active == True, BankQuestion.prompt_version != version
+        ).update({BankQuestion.is_active: False})
+        db.commit()
+        return retired
+    finally:
+        db.close()
+
+
+async def fill_bank(topics: list[str], per_cell: int, concurrency: int) -> int:
+    semaphore = asyncio.Semaphore(concurrency)
+    added = await asyncio.gather(*(
+        fill_cell(topic, difficulty, per_cell, semaphore) for topic in topics for difficulty in DIFFICULTIES
+    ))
+    return sum(added)
+
+
+def print_stats():
+    db = SessionLocal()
+    try:
+        rows = db.query(BankQuestion).filter(BankQuestion.is_active == True).all()
+    finally:
+        db.close()
+    counts: dict[tuple[str, str], int] = {}
+    for row in rows:
+        counts[(row.topic, row.difficulty)] = counts.get((row.topic, row.difficulty), 0) + 1
+    print(f"{'topic':28} " + " ".join(f"{difficulty:>7}" for difficulty in DIFFICULTIES))
+    for topic in sorted({topic for topic, _ in counts}):
+        print(f"{topic:28} " + " ".join(f"{counts.get((topic, difficulty), 0):>7}" for difficulty in DIFFICULTIES))
+    print(f"{len(rows)} active question(s)")
+
+
+def main():
+    # python question_bank.py build --per-cell 8
+    # python question_bank.py refresh --per-cell 8   (retire questions from an older prompt, then top up)
+    # python question_bank.py stats
+    parser = argparse.ArgumentParser(description="Build and maintain the pre-generated Excel question bank.")
+    parser.add_argument("command", choices=["build", "refresh", "stats"])
+    parser.add_argument("--per-cell", type=int, default=8, help="active questions wanted per topic and difficulty")
+    parser.add_argument("--topics", nargs="+", default=EXCEL_TOPICS)
+    parser.add_argument("--concurrency", type=int, default=4, help="parallel generation requests")
+    args = parser.parse_args()
+
+    configure_logging()
+    init_database()
+    if args.command == "stats":
+        print_stats()
+        return
+    if args.command == "refresh":
+        print(f"Retired {retire_stale_questions()} question(s) from older prompt versions")
+    added = asyncio.run(fill_bank(args.topics, args.per_cell, args.concurrency))
+    print(f"Added {added} question(s)")
+    print_stats()
+
+
+if __name__ == "__main__":
+    main()
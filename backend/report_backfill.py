@@ -0,0 +1,119 @@
+import argparse
+import asyncio
+from typing import Optional
+from database import AsyncSessionLocal, init_database, close_database
+from db_operations import AsyncDatabaseOperations
+from evaluator import generate_interview_summary
+from logging_config import configure_logging
+from models import State, Answer, EvaluationResponse, FinalReport
+from report_jobs import report_job_stale, REPORT_PENDING
+from session_store import SessionStore, create_session_store
+
+
+async def rebuild_inputs(session_id: str) -> tuple[State, list[EvaluationResponse]]:
+    # The summary prompt only needs the answers and their evaluations, which the transcript
+    # tables still hold after the session left the store.
+    async with AsyncSessionLocal() as db:
+        session = await AsyncDatabaseOperations(db).get_transcript_session(session_id)
+    state = State()
+    evaluation_data = []
+    for question in sorted(session.questions, key=lambda q: q.question_order):
+        for answer in question.answers:
+            state.user_answers.append(Answer(text=answer.answer_text))
+            for evaluation in answer.evaluations:
+                evaluation_data.append(EvaluationResponse(
+                    score=evaluation.score,
+                    comments=evaluation.comments or "",
+                    detailed_report=evaluation.detailed_report
+                ))
+    return state, evaluation_data
+
+
+def needs_report(session: Optional[dict], is_finished: bool) -> bool:
+    # Unfinished rows only count when the store says the interview ended, and a report job
+    # that may still be running is left alone.
+    if session is not None and session.get("report_status") == REPORT_PENDING and not report_job_stale(session):
+        return False
+    return is_finished or bool(session and session.get("finished"))
+
+
+async def backfill_one(store: SessionStore, session_id: str, is_finished: bool, dry_run: bool) -> str:
+    # A report still held by the session store is saved as-is; only the rest cost an LLM call.
+    session = await store.get(session_id)
+    final_report: FinalReport = session.get("final_report") if session else None
+    source = "store"
+    if final_report is None:
+        state, evaluation_data = await rebuild_inputs(session_id)
+        if not evaluation_data:
+            raise ValueError("no evaluated answers")
+        source = "regenerated"
+        if dry_run:
+            return source
+        final_report = await generate_interview_summary(session_id, state, evaluation_data, fallback=False)
+    if not dry_run:
+        async with AsyncSessionLocal() as db:
+            operations = AsyncDatabaseOperations(db)
+            if is_finished:
+                await operations.save_final_report(session_id, final_report)
+            else:
+                # The report job died before it could close the session, so do it here.
+                await operations.finish_session(session_id, final_report.average_score, final_report.overall_performance, final_report)
+    return source
+
+
+async def backfill(limit: Optional[int], batch_size: int, concurrency: int, dry_run: bool) -> dict:
+    async with AsyncSessionLocal() as db:
+        candidates = await AsyncDatabaseOperations(db).list_sessions_missing_report()
+
+    store = create_session_store()
+    sessions: list[tuple[str, bool]] = []
+    for session_id, is_finished in candidates:
+        if limit is not None and len(sessions) >= limit:
+            break
+        if needs_report(None if is_finished else await store.get(session_id), is_finished):
+            sessions.append((session_id, is_finished))
+    print(f"{len(sessions)} finished session(s) without a stored report")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    counts = {"store": 0, "regenerated": 0, "failed": 0}
+
+    async def run(session_id: str, is_finished: bool):
+        async with semaphore:
+            try:
+                source = await backfill_one(store, session_id, is_finished, dry_run)
+            except Exception as e:
+                counts["failed"] += 1
+                print(f" {session_id}: failed: {e}")
+                return
+            counts[source] += 1
+            print(f" {session_id}: {source}{' (dry run)' if dry_run else ''}")
+
+    try:
+        # Batches keep a long backfill resumable: every finished batch is already committed, and
+        # a rerun only picks up sessions that still have no report.
+        for start in range(0, len(sessions), batch_size):
+            await asyncio.gather(*(run(session_id, is_finished) for session_id, is_finished in sessions[start:start + batch_size]))
+    finally:
+        await store.close()
+        await close_database()
+    return counts
+
+
+def main():
+    # python report_backfill.py --dry-run
+    # python report_backfill.py --concurrency 4 --batch-size 50
+    parser = argparse.ArgumentParser(description="Store final reports for finished sessions that do not have one.")
+    parser.add_argument("--limit", type=int, default=None, help="at most this many sessions")
+    parser.add_argument("--batch-size", type=int, default=50, help="sessions per batch")
+    parser.add_argument("--concurrency", type=int, default=4, help="parallel report generations within a batch")
+    parser.add_argument("--dry-run", action="store_true", help="only list what would be stored or regenerated")
+    args = parser.parse_args()
+
+    configure_logging()
+    init_database()
+    counts = asyncio.run(backfill(args.limit, args.batch_size, args.concurrency, args.dry_run))
+    print(f"From store: {counts['store']}, regenerated: {counts['regenerated']}, failed: {counts['failed']}")
+
+
+if __name__ == "__main__":
+    main()
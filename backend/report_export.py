@@ -0,0 +1,112 @@
+import asyncio
+import io
+import json
+import os
+import zipfile
+from collections import deque
+from datetime import datetime
+from typing import AsyncIterator, Iterable, Optional
+from db_operations import AsyncDatabaseOperations
+from database import AsyncSessionLocal
+from pdf_cache import PdfCache
+from report_jobs import load_report
+from session_store import SessionStore
+
+EXPORT_CONCURRENCY = int(os.getenv("EXPORT_CONCURRENCY", "4"))
+EXPORT_MAX_SESSIONS = int(os.getenv("EXPORT_MAX_SESSIONS", "1000"))
+
+
+class ZipStream(io.RawIOBase):
+    # Write-only, unseekable sink for zipfile. zipfile then writes data descriptors after each
+    # entry instead of seeking back, so finished bytes can be drained and sent right away.
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ReportExporter:
+    def __init__(self, store: SessionStore, pdf_cache: PdfCache, session_factory=AsyncSessionLocal,
+                 concurrency: int = EXPORT_CONCURRENCY):
+        self.store = store
+        self.pdf_cache = pdf_cache
+        self.session_factory = session_factory
+        self.concurrency = concurrency
+
+    async def _export_one(self, session_id: str, include_transcript: bool) -> tuple[str, Optional[bytes], Optional[dict], Optional[str]]:
+        # Stored reports are read from the database; the session store is only consulted for the
+        # rest, and without filling its cache with sessions nobody is interviewing in.
+        async with self.session_factory() as db:
+            final_report = await AsyncDatabaseOperations(db).get_final_report(session_id)
+        if final_report is None:
+            report = await load_report(self.store, session_id, self.session_factory, cache=False)
+            if report is None:
+                return session_id, None, None, "session not found"
+            final_report = report.final_report
+            if final_report is None:
+                return session_id, None, None, f"report not available (status: {report.status})"
+        try:
+            _, pdf_bytes = await self.pdf_cache.render(session_id, final_report)
+            transcript = None
+            if include_transcript:
+                async with self.session_factory() as db:
+                    transcript = await AsyncDatabaseOperations(db).get_session_transcript(session_id)
+        except Exception as e:
+            return session_id, None, None, str(e)
+        return session_id, pdf_bytes, transcript, None
+
+    async def _results(self, session_ids: Iterable[str], include_transcript: bool):
+        # At most `concurrency` sessions are in flight; results come back in request order, so
+        # only that many PDFs are held in memory at any time.
+        ids = iter(session_ids)
+        pending: deque[asyncio.Task] = deque()
+        try:
+            for session_id in ids:
+                pending.append(asyncio.create_task(self._export_one(session_id, include_transcript)))
+                if len(pending) >= self.concurrency:
+                    break
+            while pending:
+                result = await pending.popleft()
+                next_id = next(ids, None)
+                if next_id is not None:
+                    pending.append(asyncio.create_task(self._export_one(next_id, include_transcript)))
+                yield result
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def stream_zip(self, session_ids: list[str], include_transcripts: bool = True) -> AsyncIterator[bytes]:
+        sink = ZipStream()
+        manifest = {"generated_at": datetime.now().isoformat(), "exported": [], "failed": {}}
+        with zipfile.ZipFile(sink, mode="w") as archive:
+            async for session_id, pdf_bytes, transcript, error in self._results(session_ids, include_transcripts):
+                if error is not None:
+                    manifest["failed"][session_id] = error
+                    continue
+                # PDF streams are already compressed, so deflating them again only costs CPU.
+                archive.writestr(f"{session_id}/report.pdf", pdf_bytes, compress_type=zipfile.ZIP_STORED)
+                if transcript is not None:
+                    archive.writestr(
+                        f"{session_id}/transcript.json",
+                        json.dumps(transcript, indent=2, default=str),
+                        compress_type=zipfile.ZIP_DEFLATED
+                    )
+                manifest["exported"].append(session_id)
+                yield sink.drain()
+            archive.writestr("manifest.json", json.dumps(manifest, indent=2), compress_type=zipfile.ZIP_DEFLATED)
+        yield sink.drain()
@@ -0,0 +1,113 @@
+import hashlib
+import html
+import json
+from collections import OrderedDict
+from dataclasses import asdict
+from pdf_cache import PdfCache, report_cache_key, template_version
+from models import FinalReport
+from report_model import ReportModel, build_report_model
+
+REPORT_MEDIA_TYPES = {
+    "pdf": "application/pdf",
+    "html": "text/html; charset=utf-8",
+    "markdown": "text/markdown; charset=utf-8",
+    "json": "application/json",
+}
+REPORT_EXTENSIONS = {"pdf": "pdf", "html": "html", "markdown": "md", "json": "json"}
+# The HTML, Markdown and JSON renderers live in this file, so editing it must change their keys.
+REPORT_FORMATS_VERSION = template_version(__file__)
+
+
+def report_format_key(session_id: str, final_report: FinalReport, format: str) -> str:
+    key = report_cache_key(session_id, final_report)
+    if format == "pdf":
+        return key
+    return hashlib.sha256(f"{key}\x00{REPORT_FORMATS_VERSION}".encode("utf-8")).hexdigest()
+
+
+def render_json(model: ReportModel) -> bytes:
+    data = asdict(model)
+    data["analysis"] = [{"section": label, "text": text} for label, text in model.analysis]
+    return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+def render_markdown(model: ReportModel) -> bytes:
+    lines = [
+        "# Excel Interview Assessment Report",
+        f"Session ID: `{model.session_id}`",
+        "",
+        "## Executive Summary",
+        model.summary,
+        "",
+        "## Candidate Assessment",
+    ]
+    for label, text in model.analysis:
+        lines += [f"**{label}:** {text}", ""]
+    for title, items in (("Key Strengths", model.strengths), ("Areas for Development", model.areas_for_improvement), ("Recommendations", model.recommendations)):
+        if items:
+            lines += [f"### {title}"] + [f"- {item}" for item in items] + [""]
+    lines += [
+        "## Final Assessment",
+        f"- Overall Performance: {model.overall_performance}",
+        f"- Average Score: {model.average_score:.1f}/10",
+        f"- Total Questions: {model.total_questions}",
+        f"- Generated: {model.generated_at}",
+        "",
+    ]
+    return "\n".join(lines).encode("utf-8")
+
+
+def render_html(model: ReportModel) -> bytes:
+    e = html.escape
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>Excel Interview Assessment Report</title></head><body>",
+        "<h1>Excel Interview Assessment Report</h1>",
+        f"<p>Session ID: {e(model.session_id)}</p>",
+        "<h2>Executive Summary</h2>",
+        f"<p>{e(model.summary)}</p>",
+        "<h2>Candidate Assessment</h2>",
+    ]
+    parts += [f"<p><strong>{e(label)}:</strong> {e(text)}</p>" for label, text in model.analysis]
+    for title, items in (("Key Strengths", model.strengths), ("Areas for Development", model.areas_for_improvement), ("Recommendations", model.recommendations)):
+        if items:
+            parts.append(f"<h3>{title}</h3><ul>" + "".join(f"<li>{e(item)}</li>" for item in items) + "</ul>")
+    parts += [
+        "<h2>Final Assessment</h2><ul>",
+        f"<li>Overall Performance: {e(model.overall_performance)}</li>",
+        f"<li>Average Score: {model.average_score:.1f}/10</li>",
+        f"<li>Total Questions: {model.total_questions}</li>",
+        f"<li>Generated: {e(model.generated_at)}</li>",
+        "</ul></body></html>",
+    ]
+    return "".join(parts).encode("utf-8")
+
+
+TEXT_RENDERERS = {"json": render_json, "markdown": render_markdown, "html": render_html}
+
+
+class ReportRenderer:
+    # Builds the normalized model once per report (keyed by the report's content hash) and
+    # renders every format from it on demand. The PDF additionally goes through its cache.
+    def __init__(self, pdf_cache: PdfCache, cache_size: int = 256):
+        self.pdf_cache = pdf_cache
+        self.cache_size = cache_size
+        self._models: OrderedDict[str, ReportModel] = OrderedDict()
+
+    def model(self, session_id: str, final_report: FinalReport, key: str) -> ReportModel:
+        model = self._models.get(key)
+        if model is None:
+            model = build_report_model(session_id, final_report)
+            self._models[key] = model
+            while len(self._models) > self.cache_size:
+                self._models.popitem(last=False)
+        else:
+            self._models.move_to_end(key)
+        return model
+
+    async def render(self, session_id: str, final_report: FinalReport, format: str, key: str = None) -> bytes:
+        key = key or report_cache_key(session_id, final_report)
+        model = self.model(session_id, final_report, key)
+        if format == "pdf":
+            _, pdf_bytes = await self.pdf_cache.render(session_id, final_report, model)
+            return pdf_bytes
+        return TEXT_RENDERERS[format](model)
@@ -0,0 +1,114 @@
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Optional
+from database import AsyncSessionLocal
+from db_operations import TurnWriter, AsyncDatabaseOperations
+from evaluator import generate_interview_summary
+from pdf_cache import PdfCache
+from models import FinalReport
+from session_store import SessionStore
+from tracing import traced, set_turn_context
+from usage_stats import capture_usage
+
+REPORT_JOB_TIMEOUT_SECONDS = int(os.getenv("REPORT_JOB_TIMEOUT_SECONDS", "600"))
+
+logger = logging.getLogger(__name__)
+
+REPORT_PENDING = "pending"
+REPORT_READY = "ready"
+REPORT_FAILED = "failed"
+REPORT_NOT_STARTED = "not_started"
+
+
+REPORT_STALE_ERROR = "Report job did not finish; retry with POST /report/{session_id}/retry"
+
+
+@dataclass
+class ReportLookup:
+    status: str
+    final_report: Optional[FinalReport] = None
+    error: Optional[str] = None
+
+
+def mark_report_pending(session: dict):
+    session["report_status"] = REPORT_PENDING
+    session["report_started_at"] = time.time()
+    session.pop("report_error", None)
+
+
+def report_job_stale(session: dict) -> bool:
+    # Jobs run in-process, so one whose worker died stays "pending" in the store forever.
+    # Pending sessions saved before the start time was recorded count as stale too.
+    started_at = session.get("report_started_at")
+    return started_at is None or time.time() - started_at > REPORT_JOB_TIMEOUT_SECONDS
+
+
+async def load_report(store: SessionStore, session_id: str, session_factory=AsyncSessionLocal,
+                      cache: bool = True) -> Optional[ReportLookup]:
+    # The session store is checked first; the database copy covers sessions that are no
+    # longer in the store. Returns None when neither knows the session.
+    session = await (store.get(session_id) if cache else store.peek(session_id))
+    if session is not None:
+        if session.get("final_report") is not None:
+            return ReportLookup(REPORT_READY, session["final_report"])
+        if session.get("report_status") == REPORT_PENDING and not report_job_stale(session):
+            return ReportLookup(REPORT_PENDING)
+
+    async with session_factory() as db:
+        final_report = await AsyncDatabaseOperations(db).get_final_report(session_id)
+    if final_report is not None:
+        return ReportLookup(REPORT_READY, final_report)
+    if session is None:
+        return None
+    status = session.get("report_status") or REPORT_NOT_STARTED
+    if status == REPORT_PENDING:
+        return ReportLookup(REPORT_FAILED, error=REPORT_STALE_ERROR)
+    return ReportLookup(status, error=session.get("report_error") if status == REPORT_FAILED else None)
+
+
+@traced("report job")
+async def run_report_job(store: SessionStore, writer: TurnWriter, pdf_cache: PdfCache, session_id: str):
+    set_turn_context(session_id)
+    session = await store.get(session_id)
+    if session is None:
+        logger.warning("report job: session not found", extra={"session_id": session_id})
+        return
+
+    try:
+        evaluation_data = session.get("evaluation_data", [])
+        if not evaluation_data:
+            raise ValueError("No evaluated answers to build a report from")
+
+        usage = capture_usage(session["state"])
+        # Without the canned fallback a provider error fails the job, so it can be retried
+        # instead of storing a placeholder report as if it were ready.
+        final_report = await generate_interview_summary(
+            session_id=session_id,
+            state=session["state"],
+            evaluation_data=evaluation_data,
+            fallback=False
+        )
+
+        avg_score = sum(eval_data.score for eval_data in evaluation_data) / len(evaluation_data)
+        await writer.finish_session(
+            session_id=session_id,
+            average_score=avg_score,
+            overall_performance=final_report.overall_performance,
+            final_report=final_report,
+            usage=usage
+        )
+
+        # Rendering here warms the PDF cache, so the first download is served from it.
+        await pdf_cache.render(session_id, final_report)
+        session["final_report"] = final_report
+        session["report_status"] = REPORT_READY
+        session.pop("report_error", None)
+        logger.info("report ready", extra={"session_id": session_id})
+    except Exception as e:
+        logger.exception("report job failed", extra={"session_id": session_id})
+        session["report_status"] = REPORT_FAILED
+        session["report_error"] = str(e)
+
+    await store.save(session_id, session)
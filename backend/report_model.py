@@ -0,0 +1,43 @@
+from dataclasses import dataclass
+from models import FinalReport
+
+# Sections and labels shared by every report format, in display order.
+ANALYSIS_SECTIONS = [
+    ("interview_flow", "Interview Flow"),
+    ("performance_consistency", "Performance Consistency"),
+    ("knowledge_depth", "Knowledge Depth"),
+    ("practical_application", "Practical Application"),
+    ("communication_effectiveness", "Communication Skills"),
+    ("role_relevance", "Role Relevance"),
+]
+DEFAULT_SUMMARY = "This report provides a comprehensive assessment of the candidate's Excel proficiency based on their interview performance."
+
+
+@dataclass
+class ReportModel:
+    session_id: str
+    summary: str
+    analysis: list[tuple[str, str]]
+    strengths: list[str]
+    areas_for_improvement: list[str]
+    recommendations: list[str]
+    overall_performance: str
+    average_score: float
+    total_questions: int
+    generated_at: str
+
+
+def build_report_model(session_id: str, final_report: FinalReport) -> ReportModel:
+    analysis = final_report.detailed_analysis or {}
+    return ReportModel(
+        session_id=session_id,
+        summary=final_report.conversation_summary or DEFAULT_SUMMARY,
+        analysis=[(label, str(analysis[key])) for key, label in ANALYSIS_SECTIONS if analysis.get(key)],
+        strengths=[str(item) for item in final_report.strengths],
+        areas_for_improvement=[str(item) for item in final_report.areas_for_improvement],
+        recommendations=[str(item) for item in final_report.recommendations],
+        overall_performance=final_report.overall_performance or "Assessment completed",
+        average_score=final_report.average_score,
+        total_questions=final_report.total_questions,
+        generated_at=final_report.generated_at or "N/A",
+    )
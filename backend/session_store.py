@@ -0,0 +1,365 @@
+import asyncio
+import fcntl
+import json
+import os
+import tempfile
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Optional
+import aiosqlite
+from pydantic_ai.messages import ModelMessagesTypeAdapter
+from models import State, Answer, Feedback, Question, EvaluationResponse, InterviewerResponse, FinalReport
+from conversation import rebuild_conversation
+from tracing import traced
+
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "sqlite")
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "./interview_sessions.db")
+SESSION_KV_DIR = os.getenv("SESSION_KV_DIR", "./session_kv")
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "256"))
+
+
+def dump_state(state: State) -> dict:
+    return {
+        "history": ModelMessagesTypeAdapter.dump_python(state.history, mode="json"),
+        "user_answers": [answer.text for answer in state.user_answers],
+        "feedback_history": [feedback.text for feedback in state.feedback_history],
+        "history_summary": state.history_summary,
+        "token_usage": state.token_usage,
+        "scores": state.scores,
+        "seen_bank_questions": state.seen_bank_questions,
+        "seen_bank_topics": state.seen_bank_topics,
+        "last_bank_turn": state.last_bank_turn,
+        "tokens_used": state.tokens_used,
+        "cost_usd": state.cost_usd,
+        "token_budget": state.token_budget,
+        "cost_budget_usd": state.cost_budget_usd,
+    }
+
+
+def load_state(data: dict) -> State:
+    return State(
+        history=ModelMessagesTypeAdapter.validate_python(data.get("history", [])),
+        user_answers=[Answer(text) for text in data.get("user_answers", [])],
+        feedback_history=[Feedback(text=text) for text in data.get("feedback_history", [])],
+        history_summary=data.get("history_summary", ""),
+        token_usage=data.get("token_usage", []),
+        scores=data.get("scores", []),
+        seen_bank_questions=data.get("seen_bank_questions", []),
+        seen_bank_topics=data.get("seen_bank_topics", []),
+        last_bank_turn=data.get("last_bank_turn", -1),
+        tokens_used=data.get("tokens_used", 0),
+        cost_usd=data.get("cost_usd", 0.0),
+        token_budget=data.get("token_budget", 0),
+        cost_budget_usd=data.get("cost_budget_usd", 0.0),
+    )
+
+
+def serialize_session(session: dict) -> bytes:
+    last_output = session.get("last_output")
+    current_question = session.get("current_question")
+    final_report = session.get("final_report")
+    payload = {
+        "state": dump_state(session["state"]),
+        "finished": session.get("finished", False),
+        "last_output": last_output.model_dump(mode="json") if last_output else None,
+        "current_question": current_question.text if current_question else None,
+        "questions": [question.model_dump(mode="json") for question in session.get("questions", [])],
+        "evaluation_data": [evaluation.model_dump(mode="json") for evaluation in session.get("evaluation_data", [])],
+        "conversation": session.get("conversation", []),
+        "final_report": final_report.model_dump(mode="json") if final_report else None,
+        "report_status": session.get("report_status"),
+        "report_error": session.get("report_error"),
+        "report_started_at": session.get("report_started_at"),
+    }
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def deserialize_session(raw: bytes) -> dict:
+    payload = json.loads(raw)
+    session = {
+        "state": load_state(payload["state"]),
+        "finished": payload.get("finished", False),
+        "last_output": InterviewerResponse.model_validate(payload["last_output"]) if payload.get("last_output") else None,
+        "current_question": Question(text=payload["current_question"]) if payload.get("current_question") is not None else None,
+        "questions": [InterviewerResponse.model_validate(question) for question in payload.get("questions", [])],
+        "evaluation_data": [EvaluationResponse.model_validate(evaluation) for evaluation in payload.get("evaluation_data", [])],
+    }
+    session["conversation"] = payload.get("conversation") or rebuild_conversation(session["questions"], session["state"].user_answers)
+    if payload.get("final_report"):
+        session["final_report"] = FinalReport.model_validate(payload["final_report"])
+    for key in ("report_status", "report_error", "report_started_at"):
+        if payload.get(key) is not None:
+            session[key] = payload[key]
+    return session
+
+
+class SessionBackend:
+    async def get(self, key: str) -> Optional[tuple[int, bytes]]:
+        raise NotImplementedError
+
+    async def get_version(self, key: str) -> Optional[int]:
+        raise NotImplementedError
+
+    async def put(self, key: str, data: bytes) -> int:
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    async def delete_expired(self, prefix: str, older_than: float) -> int:
+        # Removes keys starting with `prefix` last written before the `older_than` timestamp.
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class SQLiteSessionBackend(SessionBackend):
+    def __init__(self, path: str = SESSION_DB_PATH):
+        self.path = path
+        self._conn: Optional[aiosqlite.Connection] = None
+        self._lock = asyncio.Lock()
+        # One shared connection: a commit fails while another coroutine's SELECT is still
+        # open on it, so statements take turns.
+        self._io_lock = asyncio.Lock()
+
+    async def _connection(self) -> aiosqlite.Connection:
+        if self._conn is None:
+            async with self._lock:
+                if self._conn is None:
+                    conn = await aiosqlite.connect(self.path, timeout=30)
+                    await conn.execute("PRAGMA journal_mode=WAL")
+                    await conn.execute("PRAGMA synchronous=NORMAL")
+                    await conn.execute(
+                        "CREATE TABLE IF NOT EXISTS sessions ("
+                        "key TEXT PRIMARY KEY, version INTEGER NOT NULL, data BLOB NOT NULL, updated_at REAL NOT NULL)"
+                    )
+                    await conn.commit()
+                    self._conn = conn
+        return self._conn
+
+    async def get(self, key: str) -> Optional[tuple[int, bytes]]:
+        conn = await self._connection()
+        async with self._io_lock:
+            async with conn.execute("SELECT version, data FROM sessions WHERE key = ?", (key,)) as cursor:
+                row = await cursor.fetchone()
+        return (row[0], bytes(row[1])) if row else None
+
+    async def get_version(self, key: str) -> Optional[int]:
+        conn = await self._connection()
+        async with self._io_lock:
+            async with conn.execute("SELECT version FROM sessions WHERE key = ?", (key,)) as cursor:
+                row = await cursor.fetchone()
+        return row[0] if row else None
+
+    async def put(self, key: str, data: bytes) -> int:
+        conn = await self._connection()
+        async with self._io_lock:
+            async with conn.execute(
+                "INSERT INTO sessions (key, version, data, updated_at) VALUES (?, 1, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET version = version + 1, data = excluded.data, updated_at = excluded.updated_at "
+                "RETURNING version",
+                (key, data, time.time()),
+            ) as cursor:
+                row = await cursor.fetchone()
+            await conn.commit()
+        return row[0]
+
+    async def delete(self, key: str) -> None:
+        conn = await self._connection()
+        async with self._io_lock:
+            await conn.execute("DELETE FROM sessions WHERE key = ?", (key,))
+            await conn.commit()
+
+    async def delete_expired(self, prefix: str, older_than: float) -> int:
+        conn = await self._connection()
+        async with self._io_lock:
+            cursor = await conn.execute(
+                "DELETE FROM sessions WHERE substr(key, 1, ?) = ? AND updated_at < ?", (len(prefix), prefix, older_than)
+            )
+            await conn.commit()
+        return cursor.rowcount
+
+    async def close(self) -> None:
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+
+class LocalKVSessionBackend(SessionBackend):
+    # Stand-in for a network key/value store: one file per key, atomically replaced on write.
+    # Each file starts with a "<version>\n" header so revalidation only reads a few bytes.
+    # Writes hold an flock on one of LOCK_STRIPES lock files (chosen by key), so two workers
+    # writing the same key cannot both read version N and both write N + 1.
+    LOCK_STRIPES = 64
+
+    def __init__(self, directory: str = SESSION_KV_DIR):
+        self.directory = directory
+        self.lock_directory = os.path.join(directory, ".locks")
+        os.makedirs(self.lock_directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        if not key or not all(c.isalnum() or c in "-_" for c in key):
+            raise ValueError(f"Invalid session key: {key!r}")
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _read(self, key: str) -> Optional[tuple[int, bytes]]:
+        try:
+            with open(self._path(key), "rb") as f:
+                version = int(f.readline())
+                return version, f.read()
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _read_version(self, key: str) -> Optional[int]:
+        try:
+            with open(self._path(key), "rb") as f:
+                return int(f.readline())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _lock_path(self, key: str) -> str:
+        return os.path.join(self.lock_directory, f"{zlib.crc32(key.encode('utf-8')) % self.LOCK_STRIPES}.lock")
+
+    def _write(self, key: str, data: bytes) -> int:
+        path = self._path(key)
+        with open(self._lock_path(key), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            version = (self._read_version(key) or 0) + 1
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f"{key}.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(f"{version}\n".encode("ascii"))
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        return version
+
+    def _remove(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _remove_expired(self, prefix: str, older_than: float) -> int:
+        removed = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(prefix) and entry.name.endswith(".json") and entry.stat().st_mtime < older_than:
+                try:
+                    os.remove(entry.path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+    async def get(self, key: str) -> Optional[tuple[int, bytes]]:
+        return await asyncio.to_thread(self._read, key)
+
+    async def get_version(self, key: str) -> Optional[int]:
+        return await asyncio.to_thread(self._read_version, key)
+
+    async def put(self, key: str, data: bytes) -> int:
+        return await asyncio.to_thread(self._write, key, data)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._remove, key)
+
+    async def delete_expired(self, prefix: str, older_than: float) -> int:
+        return await asyncio.to_thread(self._remove_expired, prefix, older_than)
+
+
+class SessionStore:
+    def __init__(self, backend: SessionBackend, cache_size: int = SESSION_CACHE_SIZE, revalidate: bool = True):
+        self.backend = backend
+        self.cache_size = cache_size
+        # With several workers another process may have advanced the session, so a cached
+        # entry is only reused when its version still matches the backend's.
+        self.revalidate = revalidate
+        self._cache: OrderedDict[str, tuple[int, dict]] = OrderedDict()
+
+    def _remember(self, session_id: str, version: int, session: dict) -> None:
+        self._cache[session_id] = (version, session)
+        self._cache.move_to_end(session_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    @traced("session_store get")
+    async def get(self, session_id: str) -> Optional[dict]:
+        cached = self._cache.get(session_id)
+        if cached is not None:
+            version, session = cached
+            if not self.revalidate or await self.backend.get_version(session_id) == version:
+                self._cache.move_to_end(session_id)
+                return session
+            del self._cache[session_id]
+
+        stored = await self.backend.get(session_id)
+        if stored is None:
+            return None
+        version, raw = stored
+        session = deserialize_session(raw)
+        self._remember(session_id, version, session)
+        return session
+
+    @traced("session_store peek")
+    async def peek(self, session_id: str) -> Optional[dict]:
+        # For bulk reads such as exports: a cached entry is used but none is added, so live
+        # interviews keep their place in the LRU.
+        cached = self._cache.get(session_id)
+        if cached is not None and (not self.revalidate or await self.backend.get_version(session_id) == cached[0]):
+            return cached[1]
+        stored = await self.backend.get(session_id)
+        return deserialize_session(stored[1]) if stored is not None else None
+
+    @traced("session_store save")
+    async def save(self, session_id: str, session: dict) -> None:
+        version = await self.backend.put(session_id, serialize_session(session))
+        self._remember(session_id, version, session)
+
+    def evict(self, session_id: str) -> None:
+        self._cache.pop(session_id, None)
+
+    async def delete(self, session_id: str) -> None:
+        self.evict(session_id)
+        await self.backend.delete(session_id)
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+
+class SessionLocks:
+    # One asyncio.Lock per session so turns on the same session run one at a time within a
+    # worker. Locks are dropped as soon as nobody holds or waits for them.
+    def __init__(self):
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._holders: dict[str, int] = {}
+
+    @asynccontextmanager
+    async def hold(self, key: Optional[str]):
+        if key is None:
+            yield
+            return
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        self._holders[key] = self._holders.get(key, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._holders[key] -= 1
+            if not self._holders[key]:
+                del self._holders[key]
+                del self._locks[key]
+
+
+def create_session_store() -> SessionStore:
+    if SESSION_BACKEND == "kv":
+        backend = LocalKVSessionBackend(SESSION_KV_DIR)
+    elif SESSION_BACKEND == "sqlite":
+        backend = SQLiteSessionBackend(SESSION_DB_PATH)
+    else:
+        raise ValueError(f"Unknown SESSION_BACKEND: {SESSION_BACKEND}")
+    return SessionStore(backend, cache_size=SESSION_CACHE_SIZE)
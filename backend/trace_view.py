@@ -0,0 +1,75 @@
+import argparse
+import json
+import os
+import sys
+
+# Prints span waterfalls from the JSONL file written with TRACING_ENABLED=true.
+#   python trace_view.py traces.jsonl --session <session_id>
+#   python trace_view.py traces.jsonl --last 5 --min-ms 1
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from tracing import TRACE_FILE
+
+BAR_WIDTH = 40
+
+
+def load_traces(path: str) -> dict[str, list[dict]]:
+    traces: dict[str, list[dict]] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                span = json.loads(line)
+                traces.setdefault(span["trace_id"], []).append(span)
+    return traces
+
+
+def print_waterfall(spans: list[dict], min_ms: float):
+    by_id = {span["span_id"]: span for span in spans}
+    children: dict[str, list[dict]] = {}
+    roots = []
+    for span in spans:
+        if span["parent_span_id"] in by_id:
+            children.setdefault(span["parent_span_id"], []).append(span)
+        else:
+            roots.append(span)
+
+    start = min(span["start_ns"] for span in spans)
+    total_ns = max(max(span["end_ns"] for span in spans) - start, 1)
+
+    def walk(span: dict, depth: int):
+        if span["duration_ms"] >= min_ms or depth == 0:
+            offset = int((span["start_ns"] - start) / total_ns * BAR_WIDTH)
+            width = max(1, int((span["end_ns"] - span["start_ns"]) / total_ns * BAR_WIDTH))
+            bar = " " * offset + "#" * min(width, BAR_WIDTH - offset)
+            label = "  " * depth + span["name"]
+            status = "" if span["status"] != "ERROR" else "  ERROR"
+            print(f"{label[:48]:<48} {span['duration_ms']:>10.2f}ms |{bar:<{BAR_WIDTH}}|{status}")
+        for child in sorted(children.get(span["span_id"], []), key=lambda s: s["start_ns"]):
+            walk(child, depth + 1)
+
+    for root in sorted(roots, key=lambda s: s["start_ns"]):
+        attributes = root["attributes"]
+        tags = " ".join(f"{key}={attributes[key]}" for key in ("session_id", "turn") if key in attributes)
+        print(f"\ntrace {root['trace_id']} {tags}")
+        walk(root, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print span waterfalls from a JSONL trace file")
+    parser.add_argument("path", nargs="?", default=TRACE_FILE)
+    parser.add_argument("--session", help="only traces with spans tagged with this session_id")
+    parser.add_argument("--last", type=int, default=10, help="number of most recent traces to print")
+    parser.add_argument("--min-ms", type=float, default=0.0, help="hide child spans shorter than this")
+    args = parser.parse_args()
+
+    traces = list(load_traces(args.path).values())
+    if args.session:
+        traces = [spans for spans in traces if any(span["attributes"].get("session_id") == args.session for span in spans)]
+    traces.sort(key=lambda spans: min(span["start_ns"] for span in spans))
+    for spans in traces[-args.last:]:
+        print_waterfall(spans, args.min_ms)
+
+
+if __name__ == "__main__":
+    main()
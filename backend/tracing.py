@@ -0,0 +1,155 @@
+import contextvars
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from typing import Optional
+from opentelemetry import trace
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() in ("1", "true", "yes")
+TRACE_FILE = os.getenv("TRACE_FILE", "./traces.jsonl")
+TRACE_AGENT_CONTENT = os.getenv("TRACE_AGENT_CONTENT", "false").lower() in ("1", "true", "yes")
+
+logger = logging.getLogger(__name__)
+
+# Without a configured provider the OpenTelemetry API hands out no-op spans, so the
+# instrumentation below costs next to nothing while tracing is off.
+tracer = trace.get_tracer("interview")
+
+# The session and turn a piece of work belongs to. Every span started while these are set is
+# tagged with them, including spans from code that never sees the session id (agent calls,
+# DB writes) and from pydantic-ai's own instrumentation.
+_session_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("trace_session_id", default=None)
+_turn: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("trace_turn", default=None)
+
+
+def set_turn_context(session_id: str, turn: Optional[int] = None):
+    _session_id.set(session_id)
+    _turn.set(turn)
+    span = trace.get_current_span()
+    span.set_attribute("session_id", session_id)
+    if turn is not None:
+        span.set_attribute("turn", turn)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    with tracer.start_as_current_span(name, attributes={k: v for k, v in attributes.items() if v is not None}) as current:
+        yield current
+
+
+def traced(name: str):
+    def decorator(fn):
+        @wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with span(name):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TracingMiddleware:
+    # One root span per HTTP request, named after the route template once routing is done.
+    # The span ends with the last body chunk; background tasks started by the request still
+    # run inside it and show up as children that end later.
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with tracer.start_as_current_span(f"{scope['method']} {scope['path']}", end_on_exit=False) as request_span:
+            request_span.set_attribute("http.method", scope["method"])
+
+            def finish():
+                if not request_span.is_recording():
+                    return
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    request_span.update_name(f"{scope['method']} {route}")
+                    request_span.set_attribute("http.route", route)
+                request_span.end()
+
+            async def send_and_finish(message):
+                if message["type"] == "http.response.start":
+                    request_span.set_attribute("http.status_code", message["status"])
+                await send(message)
+                if message["type"] == "http.response.body" and not message.get("more_body", False):
+                    finish()
+
+            try:
+                await self.app(scope, receive, send_and_finish)
+            finally:
+                finish()
+
+
+def span_record(span) -> dict:
+    parent = span.parent
+    return {
+        "name": span.name,
+        "trace_id": format(span.context.trace_id, "032x"),
+        "span_id": format(span.context.span_id, "016x"),
+        "parent_span_id": format(parent.span_id, "016x") if parent else None,
+        "start_ns": span.start_time,
+        "end_ns": span.end_time,
+        "duration_ms": round((span.end_time - span.start_time) / 1e6, 3),
+        "status": span.status.status_code.name,
+        "attributes": dict(span.attributes or {}),
+        "events": [
+            {"name": event.name, "time_ns": event.timestamp, "attributes": dict(event.attributes or {})}
+            for event in span.events
+        ],
+    }
+
+
+def configure_tracing(path: str = TRACE_FILE, include_agent_content: bool = TRACE_AGENT_CONTENT):
+    # Imported here so the SDK is only needed when tracing is turned on.
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider, SpanProcessor
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+    from pydantic_ai import Agent
+    from pydantic_ai.models.instrumented import InstrumentationSettings
+
+    class TurnContextProcessor(SpanProcessor):
+        def on_start(self, span, parent_context=None):
+            session_id, turn = _session_id.get(), _turn.get()
+            if session_id is not None:
+                span.set_attribute("session_id", session_id)
+            if turn is not None:
+                span.set_attribute("turn", turn)
+
+    class JsonlSpanExporter(SpanExporter):
+        # One finished span per line, appended to a local file: no collector needed, and
+        # traces can be rebuilt offline by grouping lines on trace_id.
+        def __init__(self, file_path: str):
+            self.file_path = file_path
+            self._lock = threading.Lock()
+
+        def export(self, spans) -> SpanExportResult:
+            lines = "".join(json.dumps(span_record(span), default=str) + "\n" for span in spans)
+            with self._lock, open(self.file_path, "a", encoding="utf-8") as f:
+                f.write(lines)
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self):
+            pass
+
+    provider = TracerProvider(resource=Resource.create({"service.name": "mock-interview-api"}))
+    provider.add_span_processor(TurnContextProcessor())
+    provider.add_span_processor(BatchSpanProcessor(JsonlSpanExporter(path)))
+    trace.set_tracer_provider(provider)
+    # Agent runs and model requests as child spans, with token usage but without prompts
+    # and answers unless asked for.
+    Agent.instrument_all(InstrumentationSettings(tracer_provider=provider, include_content=include_agent_content))
+    logger.info("tracing enabled", extra={"trace_file": path})
+    return provider
+
+
+def shutdown_tracing():
+    provider = trace.get_tracer_provider()
+    if hasattr(provider, "shutdown"):
+        provider.shutdown()
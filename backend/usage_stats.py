@@ -0,0 +1,144 @@
+import contextvars
+import json
+import logging
+import os
+from dataclasses import dataclass, asdict
+from typing import Optional
+from pydantic_ai.messages import ModelMessage, ModelResponse
+from pydantic_ai.usage import RunUsage
+from models import State
+
+LLM_PRICING = os.getenv("LLM_PRICING", "")
+# Limits for new sessions; 0 means no limit. A start request can only ask for a lower one.
+SESSION_TOKEN_BUDGET = int(os.getenv("SESSION_TOKEN_BUDGET", "0"))
+SESSION_COST_BUDGET_USD = float(os.getenv("SESSION_COST_BUDGET_USD", "0"))
+
+logger = logging.getLogger(__name__)
+
+# USD per million tokens: (input, cached input, output). Model names are matched by longest
+# prefix after the provider, so dated snapshots like "gpt-4o-2024-08-06" use the "gpt-4o" row.
+DEFAULT_PRICING = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+}
+
+
+def load_pricing(path: str = LLM_PRICING) -> dict[str, tuple[float, float, float]]:
+    if not path:
+        return dict(DEFAULT_PRICING)
+    with open(path, "r", encoding="utf-8") as f:
+        return {**DEFAULT_PRICING, **{model: tuple(prices) for model, prices in json.load(f).items()}}
+
+
+pricing = load_pricing()
+
+
+def estimate_cost(model: Optional[str], input_tokens: int, cache_read_tokens: int, output_tokens: int) -> float:
+    # Unknown models (including test doubles) are counted as free rather than guessed.
+    name = (model or "").split(":", 1)[-1]
+    matches = [key for key in pricing if name.startswith(key)]
+    if not matches:
+        return 0.0
+    input_price, cached_price, output_price = pricing[max(matches, key=len)]
+    uncached = max(input_tokens - cache_read_tokens, 0)
+    return (uncached * input_price + cache_read_tokens * cached_price + output_tokens * output_price) / 1_000_000
+
+
+def response_model_name(messages: list[ModelMessage]) -> Optional[str]:
+    for message in reversed(messages):
+        if isinstance(message, ModelResponse):
+            return message.model_name
+    return None
+
+
+@dataclass
+class AgentUsage:
+    requests: int = 0
+    input_tokens: int = 0
+    cache_read_tokens: int = 0
+    output_tokens: int = 0
+    cost_usd: float = 0.0
+
+
+@dataclass
+class UsageRecord:
+    agent: str
+    model: Optional[str]
+    input_tokens: int
+    cache_read_tokens: int
+    output_tokens: int
+    cost_usd: float
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+
+# Per-process totals; cache_read_tokens is the part of input_tokens the provider served
+# from its prompt cache.
+usage_by_agent: dict[str, AgentUsage] = {}
+
+# Calls made while a capture is active are also collected for the caller, e.g. to store a
+# turn's usage with its rows, and charged to the session's state as they happen so budget
+# checks later in the same turn see them. Tasks started inside a capture share it.
+_capture: contextvars.ContextVar[Optional[tuple[list[UsageRecord], Optional[State]]]] = contextvars.ContextVar("usage_capture", default=None)
+
+
+def capture_usage(state: Optional[State] = None) -> list[UsageRecord]:
+    records: list[UsageRecord] = []
+    _capture.set((records, state))
+    return records
+
+
+def session_budget(server_default, requested):
+    # A start request may only tighten the server's limit, never lift or disable it.
+    if requested is None or requested <= 0:
+        return server_default
+    return min(server_default, requested) if server_default > 0 else requested
+
+
+def budget_exhausted(state: State) -> bool:
+    return (
+        (state.token_budget > 0 and state.tokens_used >= state.token_budget)
+        or (state.cost_budget_usd > 0 and state.cost_usd >= state.cost_budget_usd)
+    )
+
+
+def record_usage(agent: str, usage: RunUsage, model: Optional[str] = None) -> UsageRecord:
+    record = UsageRecord(
+        agent=agent,
+        model=model,
+        input_tokens=usage.input_tokens,
+        cache_read_tokens=usage.cache_read_tokens,
+        output_tokens=usage.output_tokens,
+        cost_usd=estimate_cost(model, usage.input_tokens, usage.cache_read_tokens, usage.output_tokens),
+    )
+    totals = usage_by_agent.setdefault(agent, AgentUsage())
+    totals.requests += usage.requests
+    totals.input_tokens += record.input_tokens
+    totals.cache_read_tokens += record.cache_read_tokens
+    totals.output_tokens += record.output_tokens
+    totals.cost_usd += record.cost_usd
+    captured = _capture.get()
+    if captured is not None:
+        records, state = captured
+        records.append(record)
+        if state is not None:
+            state.tokens_used += record.total_tokens
+            state.cost_usd += record.cost_usd
+    logger.debug("agent usage", extra=asdict(record))
+    return record
+
+
+def prompt_cache_summary() -> dict:
+    return {
+        agent: {
+            **asdict(totals),
+            "cost_usd": round(totals.cost_usd, 6),
+            "cache_hit_ratio": round(totals.cache_read_tokens / totals.input_tokens, 3) if totals.input_tokens else 0.0,
+        }
+        for agent, totals in usage_by_agent.items()
+    }
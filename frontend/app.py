@@ -2,6 +2,7 @@ import streamlit as st
 import requests
 import os
 import json
+import uuid
 
 BACKEND = os.getenv("BACKEND_URL", "http://localhost:8000")
 
@@ -28,6 +29,33 @@ def make_api_call(endpoint, data=None, method="POST"):
     except requests.exceptions.RequestException as e:
         return None, f"Connection Error: {str(e)}"
 
+def stream_api_call(data, placeholder, idempotency_key=None):
+    # Renders the interviewer's message token by token from the SSE endpoint and
+    # returns the final "done" payload.
+    headers = {"Idempotency-Key": idempotency_key} if idempotency_key else {}
+    try:
+        with requests.post(f"{BACKEND}/interview/stream", json=data, headers=headers, stream=True, timeout=120) as response:
+            if response.status_code != 200:
+                return None, f"API Error: {response.status_code} - {response.text}"
+            
+            message = ""
+            event = None
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith("event: "):
+                    event = line[len("event: "):]
+                elif line.startswith("data: "):
+                    payload = json.loads(line[len("data: "):])
+                    if event == "token":
+                        message += payload["delta"]
+                        placeholder.info(message + "▌")
+                    elif event == "done":
+                        return payload, None
+                    elif event == "error":
+                        return None, f"API Error: {payload['status_code']} - {payload['detail']}"
+            return None, "Connection Error: stream ended before the interviewer finished"
+    except requests.exceptions.RequestException as e:
+        return None, f"Connection Error: {str(e)}"
+
 if st.session_state.session_id is None:
     st.markdown("### Welcome to the Excel Interview!")
     st.markdown("This AI-powered interviewer will ask you Excel-related questions to test your knowledge.")
@@ -35,13 +63,17 @@ if st.session_state.session_id is None:
     st.markdown("- Answer each question to the best of your ability")
     
     if st.button("🚀 Start Interview", type="primary"):
+        placeholder = st.empty()
         with st.spinner("Starting interview..."):
-            data, error = make_api_call("/interview/", {})
+            if "start_key" not in st.session_state:
+                st.session_state.start_key = str(uuid.uuid4())
+            data, error = stream_api_call({}, placeholder, st.session_state.start_key)
             
             if error:
                 st.error(error)
             else:
                 st.session_state.session_id = data["session_id"]
+                del st.session_state.start_key
                 st.session_state.current_message = data["message"]
                 st.session_state.finished = data["finished"]
                 st.rerun()
@@ -74,11 +106,16 @@ else:
             submit_btn = st.button("📤 Submit Answer", type="primary")
         
         if submit_btn and user_input.strip():
+            st.markdown("### 🤖 Interviewer's Reply")
+            placeholder = st.empty()
             with st.spinner("Processing your answer..."):
-                data, error = make_api_call("/interview/", {
+                # Resubmitting the same answer after an error replays the turn the backend may
+                # already have completed instead of answering twice.
+                idempotency_key = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{st.session_state.session_id}/{st.session_state.input_key}/{user_input}"))
+                data, error = stream_api_call({
                     "session_id": st.session_state.session_id,
                     "user_input": user_input
-                })
+                }, placeholder, idempotency_key)
                 
                 if error:
                     st.error(error)
@@ -106,14 +143,20 @@ else:
             if st.button("📄 Generate PDF Report", type="primary"):
                 with st.spinner("Generating PDF report..."):
                     try:
-                        response = requests.get(f"{BACKEND}/report/{st.session_state.session_id}")
-                        if response.status_code == 200:
+                        cached_report = st.session_state.get("report_pdf")
+                        headers = {"If-None-Match": cached_report["etag"]} if cached_report else {}
+                        response = requests.get(f"{BACKEND}/report/{st.session_state.session_id}", headers=headers)
+                        if response.status_code == 200 and response.headers.get("ETag"):
+                            st.session_state.report_pdf = {"etag": response.headers["ETag"], "content": response.content}
+                        if response.status_code in (200, 304):
                             st.download_button(
                                 "📥 Download PDF Report",
-                                data=response.content,
+                                data=response.content if response.status_code == 200 else cached_report["content"],
                                 file_name="excel_interview_report.pdf",
                                 mime="application/pdf"
                             )
+                        elif response.status_code == 202:
+                            st.info("Your report is still being prepared. Please try again in a few seconds.")
                         else:
                             st.error(f"Error generating report: {response.text}")
                     except Exception as e:
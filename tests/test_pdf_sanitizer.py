@@ -0,0 +1,31 @@
+import os
+import random
+import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from bench_pdf import PAYLOADS, report_strings
+from pdf_gen import clean_text_for_pdf, EMOJI_REPLACEMENTS
+
+
+def reference_clean_text(text: str) -> str:
+    # The original sanitizer: one str.replace per emoji, then collapse non-ASCII runs.
+    if not text:
+        return ""
+    for emoji, replacement in EMOJI_REPLACEMENTS.items():
+        text = text.replace(emoji, replacement)
+    return re.sub(r'[^\x00-\x7F]+', '[?]', text)
+
+
+def test_clean_text_matches_reference_sanitizer():
+    # Every benchmark payload string, plus random mixes of ASCII, emoji (with and without
+    # variation selectors) and other non-ASCII characters.
+    rng = random.Random(0)
+    alphabet = list("abc XYZ:.-'\"\n") + list(EMOJI_REPLACEMENTS) + ["\ufe0f", "é", "•", "—", "中", "🙂", "⚠", "🏋", "🏻"]
+    texts = [text for report in PAYLOADS.values() for text in report_strings(report)]
+    texts += ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40))) for _ in range(5000)]
+
+    mismatches = [(text, clean_text_for_pdf(text), reference_clean_text(text)) for text in texts if clean_text_for_pdf(text) != reference_clean_text(text)]
+
+    assert mismatches == []
@@ -0,0 +1,74 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# The backend reads its configuration at import time, so point it at a scratch directory first.
+DATA_DIR = tempfile.mkdtemp()
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ["DATABASE_PATH"] = os.path.join(DATA_DIR, "interview_transcripts.db")
+os.environ["SESSION_BACKEND"] = "sqlite"
+os.environ["SESSION_DB_PATH"] = os.path.join(DATA_DIR, "interview_sessions.db")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from database import AsyncSessionLocal, init_database, close_database
+from db_operations import AsyncDatabaseOperations, TurnWriter
+from models import State, Answer, EvaluationResponse, InterviewerResponse, FinalReport
+from report_backfill import backfill
+from report_jobs import REPORT_PENDING
+from session_store import create_session_store
+
+
+def final_report(session_id: str) -> FinalReport:
+    return FinalReport(
+        session_id=session_id, total_questions=2, average_score=7.0, overall_performance="Good",
+        conversation_summary="summary", detailed_analysis={}, strengths=[], areas_for_improvement=[],
+        recommendations=[], generated_at="",
+    )
+
+
+async def create_session(session_id: str, report_started_at: float, finished: bool = True):
+    writer = TurnWriter()
+    closing = InterviewerResponse(question="Thanks, that's all.", difficulty=None, finished=finished)
+    await writer.start_session(session_id, InterviewerResponse(question="Q1?", difficulty="easy", finished=False))
+    await writer.save_turn(session_id, 1, "A1", EvaluationResponse(score=7, comments="ok"), closing)
+
+    store = create_session_store()
+    await store.save(session_id, {
+        "state": State(user_answers=[Answer("A1")]),
+        "finished": finished,
+        "last_output": closing,
+        "questions": [closing],
+        "evaluation_data": [EvaluationResponse(score=7, comments="ok")],
+        "final_report": final_report(session_id),
+        "report_status": REPORT_PENDING,
+        "report_started_at": report_started_at,
+    })
+    await store.close()
+
+
+async def stored_row(session_id: str):
+    async with AsyncSessionLocal() as db:
+        return await AsyncDatabaseOperations(db).get_session(session_id)
+
+
+def test_backfill_finishes_sessions_stuck_in_pending():
+    init_database()
+
+    async def scenario():
+        await create_session("stuck", report_started_at=time.time() - 24 * 3600)
+        await create_session("running", report_started_at=time.time())
+        await create_session("in-progress", report_started_at=time.time() - 24 * 3600, finished=False)
+        counts = await backfill(limit=None, batch_size=10, concurrency=2, dry_run=False)
+        rows = [await stored_row(session_id) for session_id in ("stuck", "running", "in-progress")]
+        await close_database()
+        return counts, rows
+
+    counts, (stuck, running, in_progress) = asyncio.run(scenario())
+
+    assert counts == {"store": 1, "regenerated": 0, "failed": 0}
+    assert stuck.is_finished
+    assert stuck.final_report_json["overall_performance"] == "Good"
+    assert running.final_report_json is None
+    assert in_progress.final_report_json is None